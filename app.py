@@ -1,11 +1,25 @@
 import streamlit as st
+import os
 from pathlib import Path
 import pandas as pd
 import re
-import random
+
+from catalog import load_catalog
+from catalog_db import database_version, load_catalog_db
+from image_variants import ImageVariants
+from profiling import Profiler, profiling_requested
+from scheduler import schedule
 
 st.set_page_config(page_title="🧑‍🍳Chef Tai🛠️", layout="centered")
 
+# ── 效能分析（RECIPE_PROFILE=1 或網址加 ?profile=1 時啟用） ───────────────────
+@st.cache_resource
+def get_profiler():
+    return Profiler()
+
+profiling = profiling_requested(st.query_params)
+perf      = get_profiler().start_run(profiling)
+
 st.markdown("""
 <style>
 [data-testid="stAppViewContainer"] { background-color: #d8d4c0 !important; }
@@ -41,43 +55,43 @@ table[data-testid="stTable"] td:nth-child(5) { min-width:60px;  max-width:60px;
 """, unsafe_allow_html=True)
 
 # ── Header ────────────────────────────────────────────────────────────────────
+# 本地圖片一律送預先縮好、重新壓縮過的變體檔（WebP），rerun 時不經過 PIL
+@st.cache_resource
+def get_image_variants():
+    return ImageVariants(Path(__file__).parent / ".cache" / "variants")
+
 header_path = Path(__file__).parent / 'chef_tai_header_centered.png'
 if header_path.exists():
-    st.image(str(header_path), use_container_width=True)
+    st.image(str(get_image_variants().variant_of_file(header_path, 1400)), use_container_width=True)
 
 st.markdown("💡 建議使用淺色模式以獲得最佳體驗 / Suggest using light mode for the best experience")
 lang = st.radio("選擇語言 / Choose Language", ["中文", "English"])
 st.title("🧑‍🍳🛠️ Flavor Engine")
 
+perf.lap("header")
+
 # ── 工具函式 ──────────────────────────────────────────────────────────────────
 def format_quantity(val):
     return str(int(val)) if float(val).is_integer() else f"{val:.1f}"
 
 # ── 資料載入 ──────────────────────────────────────────────────────────────────
-@st.cache_data
-def load_data():
-    excel_path = Path(__file__).parent / "Recipe_Database_Corrected.xlsx"
-    raw = pd.read_excel(excel_path, sheet_name=None)
-    ingredients     = raw["Ingredients"]
-    recipes         = raw["Recipes"]
-    components      = raw["Components"]
-    ingredient_dict = raw["IngredientDict"]
-    steps           = raw["Steps"]
-    tools           = raw.get("Tools", pd.DataFrame(
-        columns=["RecipeID", "ToolName", "ToolName_zh", "Optional"]))
-    merged = (
-        ingredients
-        .merge(components.drop(columns=["RecipeID"]), on="ComponentID", how="left")
-        .merge(recipes,          on="RecipeID",   how="left")
-        .merge(ingredient_dict,  on="Ingredient", how="left")
-    )
-    merged["RecipeName"]    = merged["RecipeName"].str.replace(r'\*\*', '', regex=True)
-    merged["RecipeName_zh"] = merged["RecipeName_zh"].str.replace(r'\*\*', '', regex=True)
-    recipes["RecipeName"]    = recipes["RecipeName"].str.replace(r'\*\*', '', regex=True)
-    recipes["RecipeName_zh"] = recipes["RecipeName_zh"].str.replace(r'\*\*', '', regex=True)
-    return merged, recipes, steps, tools
+# cache_resource：整個 process 共用同一份唯讀目錄，rerun 不再反序列化 / 複製 DataFrame
+# 冷啟動時若 workbook 指紋與快照相符，直接讀 Arrow 快照，不重新解析 xlsx
+# 設定 RECIPE_CATALOG_DB 時改從 SQLite 載入（python catalog_db.py import 由 xlsx 匯入 / 同步）：
+# 常駐的只有 recipes 表與精簡索引，單一食譜的食材 / 步驟 / 工具在渲染時才查詢。
+# db_version 只當快取鍵：資料庫檔案一有變動（重新匯入或直接修改）下次 rerun 就重新載入
+@st.cache_resource(max_entries=1)
+def load_data(db_version=None):
+    if os.environ.get("RECIPE_CATALOG_DB"):
+        return load_catalog_db(os.environ["RECIPE_CATALOG_DB"])
+    return load_catalog(Path(__file__).parent / "Recipe_Database_Corrected.xlsx")
 
-df, recipes_df, steps_df, tools_df = load_data()
+recipe_catalog    = load_data(database_version(os.environ["RECIPE_CATALOG_DB"])
+                              if os.environ.get("RECIPE_CATALOG_DB") else None)
+facets            = recipe_catalog.facets
+ingredient_index  = recipe_catalog.ingredient_index
+quantity_matrices = recipe_catalog.quantities
+perf.lap("load")
 
 # ── Session state 初始化 ──────────────────────────────────────────────────────
 # 只用 session_state 存篩選條件和驚喜挑選的結果
@@ -90,23 +104,32 @@ for key, default in [
     if key not in st.session_state:
         st.session_state[key] = default
 
-cat_key     = 'Category_zh'    if lang == "中文" else 'Category'
-subcat_key  = 'SubCategory_zh' if lang == "中文" else 'SubCategory'
 display_col = 'RecipeName_zh'  if lang == "中文" else 'RecipeName'
 
-# ── recipe_options：從 recipes_df 產生乾淨 list ───────────────────────────────
-filtered_recipes = recipes_df.copy()
-if st.session_state.selected_category != 'All':
-    filtered_recipes = filtered_recipes[filtered_recipes[cat_key] == st.session_state.selected_category]
-if st.session_state.selected_subcategory != 'All':
-    filtered_recipes = filtered_recipes[filtered_recipes[subcat_key] == st.session_state.selected_subcategory]
-recipe_options = list(filtered_recipes[display_col].unique())
-
-# ── filtered_df：供 BoM / 步驟查詢 ───────────────────────────────────────────
-df["RecipeDisplay"] = df[display_col]
-filtered_df = df[df["RecipeDisplay"].isin(recipe_options)].copy()
+# ── recipe_options：直接查 facet 索引（載入時已依類別 / 風格分好） ─────────────
+# 有設定食材搜尋時改用食材倒排索引的排名，再套類別 / 風格篩選；
+# 搜尋條件的 widget 在下方「依食材搜尋」區塊，其值在 rerun 開始時已在 session_state
+current_filter = (st.session_state.selected_category, st.session_state.selected_subcategory)
+ingredient_mode = st.session_state.get("ingredient_mode", "search")
+ingredient_hits, missing_counts = None, None
+if ingredient_mode == "search":
+    ingredient_query = {k: st.session_state.get(f"ing_{k}_{lang}", []) for k in ("all_of", "any_of", "none_of")}
+    if any(ingredient_query.values()):
+        ingredient_hits = ingredient_index.search(lang, **ingredient_query)
+else:
+    pantry_have = st.session_state.get(f"ing_have_{lang}", [])
+    if pantry_have:
+        ingredient_hits, missing_counts = ingredient_index.cookable(
+            lang, pantry_have, int(st.session_state.get("ing_max_missing", 0)))
+if ingredient_hits is None:
+    recipe_options = list(facets.recipe_names(lang, *current_filter))
+else:
+    recipe_options = list(facets.recipe_names_at(lang, ingredient_hits, *current_filter))
 
 # ── 驚喜挑選 ─────────────────────────────────────────────────────────────────
+# 直接從 facet 食譜池抽樣；有食材搜尋時只從搜尋結果中抽；網址加 ?seed=<整數> 可重現同樣的挑選結果
+pick_seed = st.query_params.get("seed", "")
+pick_seed = int(pick_seed) if pick_seed.isdigit() else None
 with st.expander("❓ 驚喜挑選" if lang == "中文" else "❓ Surprise Pick", expanded=False):
     mode = st.radio(
         "選擇模式" if lang == "中文" else "Select Mode",
@@ -121,8 +144,8 @@ with st.expander("❓ 驚喜挑選" if lang == "中文" else "❓ Surprise Pick"
             if not recipe_options:
                 st.error("目前篩選條件下無可用食譜" if lang == "中文" else "No recipes available.")
             else:
-                n = min(int(num_dishes), len(recipe_options))
-                st.session_state.surprise_result = random.sample(recipe_options, n)
+                st.session_state.surprise_result = recipe_catalog.sampler.sample(
+                    lang, int(num_dishes), within=current_filter, seed=pick_seed, positions=ingredient_hits)
                 st.rerun()
     else:
         num_dishes = st.number_input(
@@ -134,14 +157,10 @@ with st.expander("❓ 驚喜挑選" if lang == "中文" else "❓ Surprise Pick"
             st.markdown(f"**第 {i+1} 道餐點設定**" if lang == "中文" else f"**Dish {i+1} Settings**")
             cat = st.selectbox(
                 f"類別 (第 {i+1} 道)" if lang == "中文" else f"Category (Dish {i+1})",
-                ['All'] + sorted(recipes_df[cat_key].dropna().unique()),
+                ['All'] + facets.categories(lang),
                 key=f"adv_cat_{i}"
             )
-            styles = (
-                ['All'] + sorted(recipes_df[recipes_df[cat_key] == cat][subcat_key].dropna().unique())
-                if cat != 'All' else
-                ['All'] + sorted(recipes_df[subcat_key].dropna().unique())
-            )
+            styles = ['All'] + facets.subcategories(lang, cat)
             subcat = st.selectbox(
                 f"風格 (第 {i+1} 道)" if lang == "中文" else f"Style (Dish {i+1})",
                 styles, key=f"adv_sub_{i}"
@@ -149,20 +168,15 @@ with st.expander("❓ 驚喜挑選" if lang == "中文" else "❓ Surprise Pick"
             filters.append((cat, subcat))
 
         if st.button("隨機挑選" if lang == "中文" else "Random Pick", key="adv_random"):
-            picked, used = [], set()
-            for idx, (cat, subcat) in enumerate(filters):
-                pool = filtered_recipes.copy()
-                if cat != 'All':
-                    pool = pool[pool[cat_key] == cat]
-                if subcat != 'All':
-                    pool = pool[pool[subcat_key] == subcat]
-                available = [r for r in pool[display_col].unique() if r not in used]
-                if not available:
+            # 每道菜的條件與目前的進階篩選取交集，同一次挑選不重複
+            picks  = recipe_catalog.sampler.pick(lang, filters, within=current_filter, seed=pick_seed,
+                                                positions=ingredient_hits)
+            picked = []
+            for idx, choice in enumerate(picks):
+                if choice is None:
                     st.warning(f"第 {idx+1} 道無符合條件食譜，跳過。" if lang == "中文" else f"No match for dish {idx+1}, skipping.")
                     continue
-                choice = random.choice(available)
                 picked.append(choice)
-                used.add(choice)
             if picked:
                 st.session_state.surprise_result = picked
                 st.rerun()
@@ -171,17 +185,13 @@ with st.expander("❓ 驚喜挑選" if lang == "中文" else "❓ Surprise Pick"
 
 # ── 進階篩選 ─────────────────────────────────────────────────────────────────
 with st.expander("🔍 進階篩選" if lang == "中文" else "🔍 Advanced Filters", expanded=False):
-    cat_options = ['All'] + sorted(recipes_df[cat_key].dropna().unique())
+    cat_options = ['All'] + facets.categories(lang)
     sel_cat = st.selectbox(
         "類別 (非必選)" if lang == "中文" else "Category (Optional)", cat_options,
         index=cat_options.index(st.session_state.selected_category)
         if st.session_state.selected_category in cat_options else 0
     )
-    avail_styles = (
-        ['All'] + sorted(recipes_df[recipes_df[cat_key] == sel_cat][subcat_key].dropna().unique())
-        if sel_cat != 'All' else
-        ['All'] + sorted(recipes_df[subcat_key].dropna().unique())
-    )
+    avail_styles = ['All'] + facets.subcategories(lang, sel_cat)
     sel_sub = st.selectbox(
         "風格 (非必選)" if lang == "中文" else "Style (Optional)", avail_styles,
         index=avail_styles.index(st.session_state.selected_subcategory)
@@ -195,6 +205,90 @@ with st.expander("🔍 進階篩選" if lang == "中文" else "🔍 Advanced Fil
         st.session_state.surprise_result      = []
         st.rerun()
 
+# ── 依食材搜尋 ───────────────────────────────────────────────────────────────
+with st.expander("🥕 依食材搜尋" if lang == "中文" else "🥕 Search by Ingredient", expanded=False):
+    ingredient_names = ingredient_index.ingredients(lang)
+    st.radio(
+        "搜尋方式" if lang == "中文" else "Search Mode", ["search", "cookable"], key="ingredient_mode",
+        format_func=lambda m: {
+            "search":   "條件搜尋 (AND / OR / NOT)" if lang == "中文" else "Match (AND / OR / NOT)",
+            "cookable": "用手邊的食材" if lang == "中文" else "Cook with what I have",
+        }[m],
+    )
+    if ingredient_mode == "search":
+        st.multiselect("全部包含" if lang == "中文" else "Must include all",
+                       ingredient_names, key=f"ing_all_of_{lang}")
+        st.multiselect("包含任一" if lang == "中文" else "Include any of",
+                       ingredient_names, key=f"ing_any_of_{lang}")
+        st.multiselect("排除" if lang == "中文" else "Exclude",
+                       ingredient_names, key=f"ing_none_of_{lang}")
+    else:
+        st.multiselect("手邊有的食材" if lang == "中文" else "Ingredients I have",
+                       ingredient_names, key=f"ing_have_{lang}")
+        st.number_input("最多缺少幾樣必要食材" if lang == "中文" else "Missing at most (required ingredients)",
+                        min_value=0, max_value=10, value=0, key="ing_max_missing")
+    if ingredient_hits is not None:
+        st.markdown(f"找到 {len(recipe_options)} 道食譜" if lang == "中文" else f"{len(recipe_options)} recipes found")
+        if missing_counts is not None:
+            # 只列出前 50 道（已依缺少數排序），缺少的食材一次算好
+            names, shown = facets.names(lang), set(recipe_options)
+            listed = [pos for pos in ingredient_hits if names[pos] in shown][:50]
+            lines  = [
+                f"• {names[pos]}" + (
+                    f" — {'缺' if lang == '中文' else 'missing'}: {', '.join(lacking)}" if lacking else "")
+                for pos, lacking in zip(listed, ingredient_index.missing(lang, listed, pantry_have))
+            ]
+            if lines:
+                st.markdown("  \n".join(lines))
+            if len(recipe_options) > len(lines):
+                st.caption(f"只列出前 {len(lines)} 道" if lang == "中文" else f"Showing the first {len(lines)}")
+
+# ── 庫存可做份數 ─────────────────────────────────────────────────────────────
+# 輸入現有庫存，整份目錄一次算出每道食譜最多能做幾倍與卡住的食材；改庫存只重跑這一段
+@st.fragment
+def render_pantry():
+    run      = get_profiler().start_run(profiling, "pantry")
+    matrix   = quantity_matrices["Ingredient_zh" if lang == "中文" else "Ingredient"]
+    name_col = "食材" if lang == "中文" else "Ingredient"
+    unit_col = "單位" if lang == "中文" else "Unit"
+    qty_col  = "庫存" if lang == "中文" else "In Stock"
+    required = matrix.columns[~matrix.columns["Optional"].astype(bool)]
+    items    = required[[matrix.ingredient_col, "Unit"]].drop_duplicates()
+    pantry = st.data_editor(
+        pd.DataFrame({name_col: items[matrix.ingredient_col].to_numpy(),
+                      unit_col: items["Unit"].to_numpy(),
+                      qty_col:  0.0}),
+        disabled=[name_col, unit_col], hide_index=True, key=f"pantry_{lang}",
+        column_config={qty_col: st.column_config.NumberColumn(min_value=0.0)},
+    )
+    stock   = {(n, u): q for n, u, q in zip(pantry[name_col], pantry[unit_col], pantry[qty_col])}
+    batches = matrix.max_batches(stock)
+
+    # 套用目前的類別 / 風格篩選
+    batches = batches[batches["RecipeID"].isin(facets.recipe_ids(lang, *current_filter))]
+    if st.checkbox("只顯示可做的食譜" if lang == "中文" else "Only recipes I can make", value=True,
+                   key="pantry_makeable"):
+        batches = batches[batches["MaxBatch"] > 0]
+    batches = batches.sort_values("MaxBatch", ascending=False, kind="stable")
+    if batches.empty:
+        st.info("目前庫存無法做出任何食譜" if lang == "中文" else "Your pantry cannot make any recipe yet.")
+        run.finish()
+        return
+    limiting = batches[matrix.ingredient_col].fillna("") + batches["Unit"].fillna("").map(
+        lambda u: f" ({u})" if u else "")
+    st.dataframe(pd.DataFrame({
+        "食譜" if lang == "中文" else "Recipe":              batches["RecipeID"].map(recipe_catalog.recipe_names[lang]),
+        "最大倍率" if lang == "中文" else "Max Batch":       batches["MaxBatch"],
+        "限制食材" if lang == "中文" else "Limiting Ingredient": limiting,
+    }), hide_index=True, column_config={
+        "最大倍率" if lang == "中文" else "Max Batch": st.column_config.NumberColumn(format="%.2f"),
+    })
+    run.finish()
+
+with st.expander("🥫 庫存可做份數" if lang == "中文" else "🥫 Pantry Max Batch", expanded=False):
+    render_pantry()
+perf.lap("pantry")
+
 # ── 食譜多選 ─────────────────────────────────────────────────────────────────
 # 驚喜挑選的結果只在有效時才當 default，用完就清掉，不持續寫回 session_state
 surprise = [r for r in st.session_state.surprise_result if r in recipe_options]
@@ -211,149 +305,16 @@ else:
     selected = []
     st.info("目前篩選條件下無可用食譜" if lang == "中文" else "No recipes available under current filters.")
 
-# ── 食譜內容 ──────────────────────────────────────────────────────────────────
-if selected:
-    multipliers = {}
-    for recipe in selected:
-        rec_df_tmp = filtered_df[filtered_df["RecipeDisplay"] == recipe]
-        if rec_df_tmp.empty:
-            continue
-        base_portion      = rec_df_tmp.iloc[0]["Portion"]
-        recipe_id_for_key = rec_df_tmp["RecipeID"].iloc[0]
-        mult = st.slider(
-            f"{recipe} - {'份量倍率' if lang == '中文' else 'Multiplier'}",
-            min_value=0.5, max_value=10.0, value=1.0, step=0.5,
-            key=f"slider_{recipe_id_for_key}"
-        )
-        st.markdown(
-            f"**{recipe} - {'單位份數' if lang == '中文' else 'Base Portion'}: "
-            f"{base_portion} - {'份數' if lang == '中文' else 'Portion'}: {base_portion} x {mult}**"
-        )
-        multipliers[recipe] = mult
-
-    selected_ids = filtered_df[filtered_df["RecipeDisplay"].isin(selected)]["RecipeID"].unique()
-
-    for recipe in selected:
-        rec_df = filtered_df[filtered_df["RecipeDisplay"] == recipe].copy()
-        if rec_df.empty:
-            continue
-        recipe_id = rec_df["RecipeID"].iloc[0]
-        mult      = multipliers.get(recipe, 1.0)
-        image_url = rec_df["ImageURL"].iloc[0]
-
-        # ── 圖片 ──
-        if isinstance(image_url, str):
-            if image_url.startswith("http"):
-                st.markdown(
-                    f'<img src="{image_url}" style="max-width:500px;max-height:700px;object-fit:contain;">',
-                    unsafe_allow_html=True
-                )
-            else:
-                image_path = Path(__file__).parent / image_url
-                if image_path.exists():
-                    st.image(str(image_path), width=500)
-                else:
-                    st.info("此食譜無圖片" if lang == "中文" else "No image for this recipe")
-        else:
-            st.info("此食譜無圖片" if lang == "中文" else "No image for this recipe")
-
-        # ── 基本資訊 ──
-        info = rec_df.iloc[0][["Portion", "Method"]]
-        recipe_steps      = steps_df[steps_df["RecipeID"] == recipe_id]
-        total_recipe_time = (
-            recipe_steps[recipe_steps["Parallel"] == False]["CycleTime"].sum()
-            if 'Parallel' in recipe_steps.columns and 'CycleTime' in recipe_steps.columns else 0
-        )
-        if lang == "中文":
-            st.markdown(f"### 🍽️ {recipe} - 👥 份量：{info['Portion']} x{mult}")
-            st.markdown(f"🍳 做法：{info['Method']}")
-            st.markdown(f"⏱️ 預估時間：{total_recipe_time} 分鐘")
-        else:
-            st.markdown(f"### 🍽️ {recipe} - 👥 Portion: {info['Portion']} x{mult}")
-            st.markdown(f"🍳 Method: {info['Method']}")
-            st.markdown(f"⏱️ Estimated Time: {total_recipe_time} min")
-
-        # ── 工具清單 ──
-        st.subheader("🧰 工具清單" if lang == "中文" else "🧰 Tool List")
-        recipe_tools = tools_df[tools_df["RecipeID"] == recipe_id]
-        if recipe_tools.empty:
-            st.info("工具資料待補" if lang == "中文" else "Tool data to be added")
-        else:
-            name_col  = "ToolName_zh" if lang == "中文" else "ToolName"
-            opt_label = "非必要"      if lang == "中文" else "Optional"
-            tool_disp = recipe_tools[[name_col]].copy()
-            tool_disp.columns = ["工具" if lang == "中文" else "Tool"]
-            tool_disp[opt_label] = (
-                recipe_tools["Optional"].apply(lambda x: "✓" if x else "")
-                if "Optional" in recipe_tools.columns else ""
-            )
-            st.table(tool_disp.reset_index(drop=True))
-
-        # ── BoM 物料表 ──
-        st.subheader("🫜 BoM 物料表" if lang == "中文" else "🫜 BoM (Bill of Materials)")
-        for comp in rec_df["ComponentName"].unique():
-            comp_df      = rec_df[rec_df["ComponentName"] == comp].copy()
-            comp_display = comp_df["ComponentName_zh"].iloc[0] if lang == "中文" else comp
-            if lang == "中文":
-                comp_df["食材"] = comp_df["Ingredient_zh"]
-                display = comp_df.groupby(["食材", "Unit", "Optional"])["Amount"].sum().mul(mult).reset_index()
-                display["數量"]   = display["Amount"].apply(format_quantity)
-                display["非必要"] = display["Optional"].apply(lambda x: "✓" if x else "")
-                display = display[["食材", "數量", "Unit", "非必要"]]
-                display.columns = ["食材", "數量", "單位", "非必要"]
-            else:
-                display = comp_df.groupby(["Ingredient", "Unit", "Optional"])["Amount"].sum().mul(mult).reset_index()
-                display["Quantity"] = display["Amount"].apply(format_quantity)
-                display["Optional"] = display["Optional"].apply(lambda x: "✓" if x else "")
-                display = display[["Ingredient", "Quantity", "Unit", "Optional"]]
-            st.subheader(f"• {comp_display}")
-            st.table(display.reset_index(drop=True))
-
-        # ── 生產流程 ──
-        st.subheader("📋 生產流程" if lang == "中文" else "📋 Sequence")
-        step_data       = steps_df[steps_df["RecipeID"] == recipe_id]
-        part_src        = "Part_zh"        if lang == "中文" else "Part"
-        instruction_src = "Instruction_zh" if lang == "中文" else "Instruction_en"
-        required_cols   = ["StepOrder", part_src, instruction_src]
-        if step_data.empty or not all(c in step_data.columns for c in required_cols):
-            st.info("步驟資料待補" if lang == "中文" else "Step data to be added")
-        else:
-            extra = (["CycleTime", "Parallel"]
-                     if "CycleTime" in step_data.columns and "Parallel" in step_data.columns else [])
-            step_data = step_data[required_cols + extra].rename(columns={
-                "StepOrder":     "步驟" if lang == "中文" else "Step",
-                part_src:        "部位" if lang == "中文" else "Part",
-                instruction_src: "說明" if lang == "中文" else "Instruction",
-                "CycleTime":     "時間" if lang == "中文" else "CycleTime",
-                "Parallel":      "並行" if lang == "中文" else "Parallel",
-            })
-            instr_col = "說明" if lang == "中文" else "Instruction"
-            part_col  = "部位" if lang == "中文" else "Part"
-            par_col   = "並行" if lang == "中文" else "Parallel"
-            step_data[instr_col] = step_data[instr_col].apply(
-                lambda x: str(x).replace('\n', '<br>').replace('; ', '<br>') if pd.notnull(x) else x
-            )
-            sequence_data, last_part = [], None
-            for _, row in step_data.iterrows():
-                cur = row[part_col]
-                if cur != last_part:
-                    sequence_data.append(row); last_part = cur
-                else:
-                    r = row.copy(); r[part_col] = ""; sequence_data.append(r)
-            sequence_df = pd.DataFrame(sequence_data)
-            if par_col in sequence_df.columns:
-                sequence_df[par_col] = sequence_df[par_col].apply(lambda x: "✓" if x else "")
-            st.markdown(sequence_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+perf.lap("filters")
 
-    # ── 採購清單 ─────────────────────────────────────────────────────────────
-    st.markdown("---")
-    st.subheader("📝 採購清單" if lang == "中文" else "📝 Procurement")
-    all_df = filtered_df[filtered_df["RecipeDisplay"].isin(selected)].copy()
-    all_df["Multiplier"]  = all_df["RecipeDisplay"].map(multipliers)
-    all_df["TotalAmount"] = all_df["Amount"] * all_df["Multiplier"]
+# ── 食譜內容 ──────────────────────────────────────────────────────────────────
+# 每道食譜（含自己的倍率 slider）是獨立的 fragment：拉動 slider 只重跑該食譜，
+# 再刷新採購清單的食材總和；其他食譜與整個頁面不重跑。
+def render_ingredient_summary(slot, selected_ids):
+    multipliers = {rid: st.session_state.multipliers.get(rid, 1.0) for rid in selected_ids.values()}
     if lang == "中文":
-        all_df["食材"] = all_df["Ingredient_zh"]
-        summary = all_df.groupby(["食材", "Unit", "Optional"])["TotalAmount"].sum().reset_index()
+        summary = quantity_matrices["Ingredient_zh"].totals(multipliers)
+        summary = summary.rename(columns={"Ingredient_zh": "食材"})
         summary["數量"]   = summary["TotalAmount"].apply(format_quantity)
         summary["非必要"] = summary["Optional"].apply(lambda x: "✓" if x else "")
         ingredient_lines = [
@@ -361,15 +322,173 @@ if selected:
             for _, r in summary.iterrows()
         ]
     else:
-        summary = all_df.groupby(["Ingredient", "Unit", "Optional"])["TotalAmount"].sum().reset_index()
+        summary = quantity_matrices["Ingredient"].totals(multipliers)
         summary["Quantity"] = summary["TotalAmount"].apply(format_quantity)
         summary["Optional"] = summary["Optional"].apply(lambda x: "✓" if x else "")
         ingredient_lines = [
             f"{r['Ingredient']}: {r['Quantity']}{r['Unit']}" + (" (optional)" if r['Optional'] else "")
             for _, r in summary.iterrows()
         ]
+    slot.code("\n".join(ingredient_lines))
+
+
+@st.fragment
+def render_recipe(recipe, recipe_id, ingredient_slot, selected_ids):
+    # fragment 單獨重跑時不經過整頁的計時器，自己開一個（區段記成 "recipe.*"）
+    run          = get_profiler().start_run(profiling, "recipe")
+    rec_df       = recipe_catalog.recipe_ingredients(recipe_id)
+    base_portion = rec_df.iloc[0]["Portion"]
+    mult = st.slider(
+        f"{recipe} - {'份量倍率' if lang == '中文' else 'Multiplier'}",
+        min_value=0.5, max_value=10.0, value=1.0, step=0.5,
+        key=f"slider_{recipe_id}"
+    )
+    st.markdown(
+        f"**{recipe} - {'單位份數' if lang == '中文' else 'Base Portion'}: "
+        f"{base_portion} - {'份數' if lang == '中文' else 'Portion'}: {base_portion} x {mult}**"
+    )
+    # 倍率有變（只會發生在此 fragment 自己重跑時）才刷新採購清單的食材總和
+    previous = st.session_state.multipliers.get(recipe_id)
+    st.session_state.multipliers[recipe_id] = mult
+    if previous is not None and previous != mult:
+        render_ingredient_summary(ingredient_slot, selected_ids)
+    run.lap("sliders")
+
+    image_url = rec_df["ImageURL"].iloc[0]
 
-    all_tools  = tools_df[tools_df["RecipeID"].isin(selected_ids)].copy()
+    # ── 圖片 ──
+    if isinstance(image_url, str):
+        if image_url.startswith("http"):
+            st.markdown(
+                f'<img src="{image_url}" style="max-width:500px;max-height:700px;object-fit:contain;">',
+                unsafe_allow_html=True
+            )
+        else:
+            image_path = Path(__file__).parent / image_url
+            if image_path.exists():
+                st.image(str(get_image_variants().variant_of_file(image_path, 500)), width=500)
+            else:
+                st.info("此食譜無圖片" if lang == "中文" else "No image for this recipe")
+    else:
+        st.info("此食譜無圖片" if lang == "中文" else "No image for this recipe")
+
+    run.lap("image")
+
+    # ── 基本資訊 ──
+    info = rec_df.iloc[0][["Portion", "Method"]]
+    recipe_steps      = recipe_catalog.recipe_steps(recipe_id)
+    # 要徑長度：並行步驟在背景進行，但最後一步要等它們完成
+    total_recipe_time = format_quantity(schedule(recipe_steps).makespan)
+    if lang == "中文":
+        st.markdown(f"### 🍽️ {recipe} - 👥 份量：{info['Portion']} x{mult}")
+        st.markdown(f"🍳 做法：{info['Method']}")
+        st.markdown(f"⏱️ 預估時間：{total_recipe_time} 分鐘")
+    else:
+        st.markdown(f"### 🍽️ {recipe} - 👥 Portion: {info['Portion']} x{mult}")
+        st.markdown(f"🍳 Method: {info['Method']}")
+        st.markdown(f"⏱️ Estimated Time: {total_recipe_time} min")
+
+    run.lap("info")
+
+    # ── 工具清單 ──
+    st.subheader("🧰 工具清單" if lang == "中文" else "🧰 Tool List")
+    recipe_tools = recipe_catalog.recipe_tools(recipe_id)
+    if recipe_tools.empty:
+        st.info("工具資料待補" if lang == "中文" else "Tool data to be added")
+    else:
+        name_col  = "ToolName_zh" if lang == "中文" else "ToolName"
+        opt_label = "非必要"      if lang == "中文" else "Optional"
+        tool_disp = recipe_tools[[name_col]].copy()
+        tool_disp.columns = ["工具" if lang == "中文" else "Tool"]
+        tool_disp[opt_label] = (
+            recipe_tools["Optional"].apply(lambda x: "✓" if x else "")
+            if "Optional" in recipe_tools.columns else ""
+        )
+        st.table(tool_disp.reset_index(drop=True))
+
+    run.lap("tools")
+
+    # ── BoM 物料表 ──
+    st.subheader("🫜 BoM 物料表" if lang == "中文" else "🫜 BoM (Bill of Materials)")
+    for comp, comp_display in recipe_catalog.bom.components(recipe_id, lang):
+        st.subheader(f"• {comp_display}")
+        st.table(recipe_catalog.bom.table(recipe_id, comp, lang, mult))
+
+    run.lap("bom")
+
+    # ── 生產流程 ──
+    st.subheader("📋 生產流程" if lang == "中文" else "📋 Sequence")
+    sequence_html = recipe_catalog.sequence_html(recipe_id, lang)
+    if sequence_html is None:
+        st.info("步驟資料待補" if lang == "中文" else "Step data to be added")
+    else:
+        st.markdown(sequence_html, unsafe_allow_html=True)
+    run.lap("steps")
+
+    # ── 相似料理（載入時已算好鄰居表，這裡只查表） ──
+    similar = recipe_catalog.similarity.similar(recipe_id, k=5)
+    if similar:
+        st.subheader("🍲 相似料理" if lang == "中文" else "🍲 Similar Dishes")
+        names = recipe_catalog.recipe_names[lang]
+        st.markdown("  \n".join(f"• {names.get(rid, rid)} ({score:.0%})" for rid, score in similar))
+    run.lap("similar")
+    run.finish()
+
+
+# 總時間只跟選取的食譜與廚師人數有關，與倍率無關；改廚師人數只重跑這一段
+@st.fragment
+def render_schedule(selected_ids):
+    run = get_profiler().start_run(profiling, "schedule")
+    st.markdown("### ⏱️ 預估總時間" if lang == "中文" else "### ⏱️ Estimated Total Time")
+    cooks = st.number_input(
+        "廚師人數" if lang == "中文" else "Number of Cooks",
+        min_value=1, max_value=10, value=1, key="num_cooks"
+    )
+    # 所有選取食譜一起排程：非並行步驟共用廚師，並行步驟在背景同時進行
+    plan = schedule(recipe_catalog.steps_of(selected_ids.values()), cooks=int(cooks))
+    st.markdown(f"{format_quantity(plan.makespan)} {'分鐘' if lang == '中文' else 'min'}")
+    if not plan.steps.empty:
+        with st.expander("🗓️ 排程明細" if lang == "中文" else "🗓️ Schedule Details", expanded=False):
+            names    = recipe_catalog.recipe_names[lang]
+            rows     = plan.steps.sort_values("Start", kind="stable")
+            part_src = "Part_zh" if lang == "中文" and "Part_zh" in rows.columns else "Part"
+            timeline = pd.DataFrame({
+                "食譜" if lang == "中文" else "Recipe":   rows["RecipeID"].map(names),
+                "步驟" if lang == "中文" else "Step":     rows["StepOrder"],
+                "部位" if lang == "中文" else "Part":     rows[part_src],
+                "開始" if lang == "中文" else "Start":    rows["Start"].map(format_quantity),
+                "結束" if lang == "中文" else "End":      rows["End"].map(format_quantity),
+                "要徑" if lang == "中文" else "Critical": rows["Critical"].map(lambda x: "✓" if x else ""),
+            })
+            st.table(timeline.reset_index(drop=True))
+    run.finish()
+
+
+if selected:
+    # 顯示名稱 → RecipeID；沒有食材資料的食譜直接略過
+    selected_ids = {}
+    for recipe in selected:
+        rid = recipe_catalog.recipe_id(recipe, display_col)
+        if rid is not None and not recipe_catalog.recipe_ingredients(rid).empty:
+            selected_ids[recipe] = rid
+    if 'multipliers' not in st.session_state:
+        st.session_state.multipliers = {}
+
+    # 先建立版面：食譜區在上，採購清單在下；食材總和放在 st.empty()，
+    # 讓食譜 fragment 重跑時可以直接改寫
+    recipes_area = st.container()
+
+    # ── 採購清單 ─────────────────────────────────────────────────────────────
+    st.markdown("---")
+    st.subheader("📝 採購清單" if lang == "中文" else "📝 Procurement")
+    st.markdown(
+        f'<span style="margin-right:5px;">•</span>'
+        f'<span style="font-size:1rem;font-weight:bold;">{"食材總和" if lang == "中文" else "Ingredients Summary"}</span>',
+        unsafe_allow_html=True
+    )
+    ingredient_slot = st.empty()
+
+    all_tools  = recipe_catalog.tools_of(selected_ids.values()).copy()
     tool_lines = []
     if not all_tools.empty:
         if lang == "中文":
@@ -380,13 +499,6 @@ if selected:
             ts = all_tools.groupby(["ToolName", "Optional"]).size().reset_index(name="Count")
             ts["Opt"] = ts["Optional"].apply(lambda x: "(optional)" if x else "")
             tool_lines = [f"{r['ToolName']}" + (f" {r['Opt']}" if r['Opt'] else "") for _, r in ts.iterrows()]
-
-    st.markdown(
-        f'<span style="margin-right:5px;">•</span>'
-        f'<span style="font-size:1rem;font-weight:bold;">{"食材總和" if lang == "中文" else "Ingredients Summary"}</span>',
-        unsafe_allow_html=True
-    )
-    st.code("\n".join(ingredient_lines))
     st.markdown(
         f'<span style="margin-right:5px;">•</span>'
         f'<span style="font-size:1rem;font-weight:bold;">{"工具總和" if lang == "中文" else "Tools Summary"}</span>',
@@ -396,15 +508,29 @@ if selected:
         st.code("\n".join(tool_lines))
     else:
         st.info("工具資料待補" if lang == "中文" else "Tool data to be added")
-
     st.markdown("---")
-    st.markdown("### ⏱️ 預估總時間" if lang == "中文" else "### ⏱️ Estimated Total Time")
-    total_time = 0
-    for rid in selected_ids:
-        rs = steps_df[steps_df["RecipeID"] == rid]
-        if 'Parallel' in rs.columns and 'CycleTime' in rs.columns:
-            total_time += rs[rs["Parallel"] == False]["CycleTime"].sum()
-    st.markdown(f"{total_time} {'分鐘' if lang == '中文' else 'min'}")
+    schedule_area = st.container()
+    perf.lap("procurement")
+
+    with recipes_area:
+        for recipe, recipe_id in selected_ids.items():
+            render_recipe(recipe, recipe_id, ingredient_slot, selected_ids)
+    perf.lap("recipes")
+
+    render_ingredient_summary(ingredient_slot, selected_ids)
+    perf.lap("procurement")
+
+    with schedule_area:
+        render_schedule(selected_ids)
+    perf.lap("schedule")
 
 else:
-    st.info("請選擇至少一道食譜" if lang == "中文" else "Please select at least one recipe.")
\ No newline at end of file
+    st.info("請選擇至少一道食譜" if lang == "中文" else "Please select at least one recipe.")
+
+perf.finish()
+
+if profiling:
+    with st.sidebar.expander("⏱️ Profiling", expanded=True):
+        st.table(pd.DataFrame(get_profiler().summary()))
+        st.download_button("Download JSON", get_profiler().to_json(),
+                           file_name="profile.json", mime="application/json")
@@ -1,17 +1,28 @@
 import streamlit as st
 from pathlib import Path
 import pandas as pd
-import requests
-from io import BytesIO
-from PIL import Image
-import re
+from concurrent.futures import as_completed
 import random
-import json
 from datetime import datetime
 
+from image_cache import AlbumResolver, ImageCache
+from image_prefetch import ImagePrefetcher, make_session
+from image_variants import ImageVariants
+from profiling import Profiler, profiling_requested
+from units import canonical_amounts
+from visits import VisitCounter
+
 # Set page configuration
 st.set_page_config(page_title="🧑‍🍳Chef Tai🛠️", layout="centered")
 
+# ── 效能分析（RECIPE_PROFILE=1 或網址加 ?profile=1 時啟用） ───────────────────
+@st.cache_resource
+def get_profiler():
+    return Profiler()
+
+profiling = profiling_requested(st.query_params)
+perf      = get_profiler().start_run(profiling)
+
 # ── 多語言文字字典 ────────────────────────────────────────────────────────────
 LANG = {
     "中文": {
@@ -43,6 +54,7 @@ LANG = {
         "portion_label":        "份數",
         "no_image":             "此食譜無圖片",
         "img_load_err":         "無法載入圖片：",
+        "img_loading":          "圖片載入中…",
         "local_img_err":        "本地圖片路徑不存在：",
         "portion":              "份量",
         "method":               "做法",
@@ -98,6 +110,7 @@ LANG = {
         "portion_label":        "Portion",
         "no_image":             "No image for this recipe",
         "img_load_err":         "Failed to load image: ",
+        "img_loading":          "Loading image…",
         "local_img_err":        "Local image path not found: ",
         "portion":              "Portion",
         "method":               "Method",
@@ -211,37 +224,40 @@ lang = st.radio("選擇語言 / Choose Language", ["中文", "English"])
 T = LANG[lang]
 
 # ── Header 圖片 ───────────────────────────────────────────────────────────────
+# 圖片一律送預先縮好、重新壓縮過的變體檔，rerun 時不經過 PIL
+@st.cache_resource
+def get_image_variants():
+    return ImageVariants(Path(__file__).parent / ".cache" / "variants")
+
 header_path = Path(__file__).parent / 'chef_tai_header_centered.png'
 if header_path.exists():
-    st.image(str(header_path), use_container_width=True)
+    st.image(str(get_image_variants().variant_of_file(header_path, 1400)), use_container_width=True)
 
 st.markdown(T["light_mode_tip"])
 
 # ── 訪客計數（用 session_state 確保每次 session 只計一次） ───────────────────
-visit_file   = Path(__file__).parent / 'visit_history.json'
-current_date = datetime.now().strftime("%Y-%m-%d")
+# 存在 SQLite：每次造訪 O(1) 寫入，今日 / 總數直接讀彙總計數；舊的 JSON 紀錄第一次啟動時匯入
+@st.cache_resource
+def get_visit_counter():
+    return VisitCounter(Path(__file__).parent / 'visit_history.sqlite3',
+                        legacy_json=Path(__file__).parent / 'visit_history.json')
 
-if visit_file.exists():
-    with open(visit_file, 'r') as f:
-        visit_data = json.load(f)
-else:
-    visit_data = {"visits": []}
+visit_counter = get_visit_counter()
+current_date  = datetime.now().strftime("%Y-%m-%d")
 
 # ★ Bug 修正：只在新 session 第一次執行時才記錄訪客
 if 'visit_counted' not in st.session_state:
     st.session_state.visit_counted = True
-    current_timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-    visit_data["visits"].append({"timestamp": current_timestamp})
-    with open(visit_file, 'w') as f:
-        json.dump(visit_data, f, indent=4)
+    visit_counter.record()
 
-total_visits = len(visit_data["visits"])
-today_visits = sum(1 for v in visit_data["visits"] if v["timestamp"].startswith(current_date))
+today_visits, total_visits = visit_counter.counts(current_date)
 st.markdown(f"**{T['today_visits']}：{today_visits} | {T['total_visits']}：{total_visits}**")
 
 # ── 標題 ─────────────────────────────────────────────────────────────────────
 st.title("🧑‍🍳🛠️ Flavor Engine")
 
+perf.lap("header")
+
 # ── 工具函式 ─────────────────────────────────────────────────────────────────
 def format_quantity(val):
     return str(int(val)) if float(val).is_integer() else f"{val:.1f}"
@@ -250,23 +266,24 @@ def snap_multiplier(value):
     # 以 0.5 為單位：0, 0.5, 1, 1.5, 2, ...
     return round(value * 2) / 2
 
-def resize_image_with_aspect_ratio(image, max_width=500, max_height=700):
-    w, h = image.size
-    ratio = w / h
-    if w > max_width:
-        w, h = max_width, int(max_width / ratio)
-    if h > max_height:
-        h, w = max_height, int(max_height * ratio)
-    return image.resize((w, h), Image.Resampling.LANCZOS)
-
-@st.cache_data(show_spinner=False)
-def fetch_image_bytes(url: str) -> bytes:
-    """遠端圖片快取，避免每次 rerender 重複下載。"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Referer": "https://imgur.com/"
-    }
-    return requests.get(url, headers=headers).content
+@st.cache_resource
+def get_image_prefetcher():
+    # 整個 process 共用一個 thread pool 與連線池；相簿解析與圖片都經磁碟快取
+    cache_dir = Path(__file__).parent / ".cache" / "images"
+    return ImagePrefetcher(ImageCache(cache_dir), AlbumResolver(cache_dir), make_session(),
+                           variants=get_image_variants())
+
+def show_remote_image(slot, fetched):
+    """把下載結果畫進 slot；失敗時顯示錯誤並退回讓瀏覽器直接載入。"""
+    with slot.container():
+        if fetched.path is not None:
+            st.image(str(fetched.path))
+        else:
+            st.error(f"{T['img_load_err']}{fetched.error}")
+            st.markdown(
+                f'<img src="{fetched.display_url}" style="max-width:500px;max-height:700px;object-fit:contain;">',
+                unsafe_allow_html=True
+            )
 
 # ── 資料載入 ─────────────────────────────────────────────────────────────────
 @st.cache_data
@@ -289,9 +306,14 @@ def load_data():
     )
     merged["RecipeName"]    = merged["RecipeName"].str.replace(r'\*\*', '', regex=True)
     merged["RecipeName_zh"] = merged["RecipeName_zh"].str.replace(r'\*\*', '', regex=True)
+    # 採購清單用：換成各食材共同基準單位的數量
+    canonical = canonical_amounts(merged)
+    merged["BaseAmount"] = canonical["Amount"]
+    merged["BaseUnit"]   = canonical["Unit"]
     return merged, recipes, steps, tools
 
 df, recipes_df, steps_df, tools_df = load_data()
+perf.lap("load")
 
 # ── Session state 初始化 ──────────────────────────────────────────────────────
 for key, default in [('selected_category', 'All'),
@@ -406,9 +428,19 @@ else:
     st.session_state.selected = []
     st.info(T["no_recipes"])
 
+perf.lap("filters")
+
+# ── 圖片預先下載：選取一確定就讓所有遠端圖片同時開始下載 ──────────────────────
+image_futures = {}
+if selected:
+    selected_urls = filtered_df[filtered_df["RecipeDisplay"].isin(selected)]["ImageURL"].unique()
+    image_futures = get_image_prefetcher().prefetch(
+        [u for u in selected_urls if isinstance(u, str) and u.startswith("http")])
+
 # ── 食譜內容展示 ──────────────────────────────────────────────────────────────
 if selected:
-    multipliers = {}
+    multipliers    = {}
+    pending_images = {}   # 還沒下載完的圖片：Future → 佔位 slot
     for recipe in selected:
         rec_df = filtered_df[filtered_df["RecipeDisplay"] == recipe].copy()
         base_portion = rec_df.iloc[0]["Portion"]
@@ -431,6 +463,7 @@ if selected:
             f"{T['portion_label']}: {base_portion} x {mult}**"
         )
         multipliers[recipe] = mult
+    perf.lap("sliders")
 
     selected_ids = filtered_df[filtered_df["RecipeDisplay"].isin(selected)]["RecipeID"].unique()
 
@@ -443,42 +476,25 @@ if selected:
         # ── 圖片 ──
         if isinstance(image_url, str):
             if image_url.startswith("http"):
-                display_url = image_url
-                if "/a/" in image_url or "/gallery/" in image_url:
-                    try:
-                        html = requests.get(image_url).text
-                        m = re.search(r'<meta property="og:image" content="([^"]+)"', html)
-                        if m:
-                            display_url = m.group(1)
-                        else:
-                            m2 = re.search(r'<link rel="image_src" href="([^"]+)"', html)
-                            if m2:
-                                display_url = m2.group(1)
-                    except Exception:
-                        pass
-                try:
-                    # ★ 改善：圖片快取，避免每次互動重新下載
-                    img_bytes = fetch_image_bytes(display_url)
-                    img = Image.open(BytesIO(img_bytes))
-                    img = resize_image_with_aspect_ratio(img)
-                    st.image(img)
-                except Exception as e:
-                    st.error(f"{T['img_load_err']}{e}")
-                    st.markdown(
-                        f'<img src="{display_url}" style="max-width:500px;max-height:700px;object-fit:contain;">',
-                        unsafe_allow_html=True
-                    )
+                # 已在背景下載（相簿網址的解析結果有持久快取，可用 image_cache.py resolve-albums 預先填好）
+                image_slot = st.empty()
+                future     = image_futures[image_url]
+                if future.done():
+                    show_remote_image(image_slot, future.result())
+                else:
+                    image_slot.info(T["img_loading"])
+                    pending_images[future] = image_slot
             else:
                 image_path = Path(__file__).parent / image_url
                 if image_path.exists():
-                    img = Image.open(image_path)
-                    img = resize_image_with_aspect_ratio(img)
-                    st.image(img)
+                    st.image(str(get_image_variants().variant_of_file(image_path, 500)))
                 else:
                     st.error(f"{T['local_img_err']}{image_path}")
         else:
             st.info(T["no_image"])
 
+        perf.lap("image")
+
         # ── 基本資訊 ──
         info = rec_df.iloc[0][["Portion", "Method"]]
         portion = f"{info['Portion']} x{mult}"
@@ -492,6 +508,8 @@ if selected:
         st.markdown(f"🍳 {T['method']}：{info['Method']}")
         st.markdown(f"⏱️ {T['est_time']}：{total_recipe_time} {T['min']}")
 
+        perf.lap("info")
+
         # ── 工具清單 ──
         st.subheader(T["tool_list"])
         recipe_tools = tools_df[tools_df["RecipeID"] == recipe_id]
@@ -509,6 +527,8 @@ if selected:
             )
             st.table(tool_display.reset_index(drop=True))
 
+        perf.lap("tools")
+
         # ── BoM 物料表 ──
         st.subheader(T["bom"])
         for comp in rec_df["ComponentName"].unique():
@@ -536,6 +556,8 @@ if selected:
             st.subheader(f"• {comp_display}")
             st.table(display.reset_index(drop=True))
 
+        perf.lap("bom")
+
         # ── 生產流程 ──
         st.subheader(T["sequence"])
         step_data = steps_df[steps_df["RecipeID"] == recipe_id]
@@ -576,13 +598,15 @@ if selected:
             if par_col in sequence_df.columns:
                 sequence_df[par_col] = sequence_df[par_col].apply(lambda x: "✓" if x else "")
             st.markdown(sequence_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+        perf.lap("steps")
 
     # ── 採購清單 ─────────────────────────────────────────────────────────────
     st.markdown("---")
     st.subheader(T["procurement"])
     all_df = filtered_df[filtered_df["RecipeDisplay"].isin(selected)].copy()
     all_df["Multiplier"]  = all_df["RecipeDisplay"].map(multipliers)
-    all_df["TotalAmount"] = all_df["Amount"] * all_df["Multiplier"]
+    all_df["TotalAmount"] = all_df["BaseAmount"] * all_df["Multiplier"]
+    all_df["Unit"]        = all_df["BaseUnit"]
 
     if lang == "中文":
         all_df["食材"] = all_df["Ingredient_zh"]
@@ -630,6 +654,8 @@ if selected:
     else:
         st.info(T["tool_pending"])
 
+    perf.lap("procurement")
+
     # ── 預估總時間 ────────────────────────────────────────────────────────────
     st.markdown("---")
     st.markdown(T["total_time"])
@@ -639,6 +665,20 @@ if selected:
         if 'Parallel' in rs.columns and 'CycleTime' in rs.columns:
             total_time += rs[rs["Parallel"] == False]["CycleTime"].sum()
     st.markdown(f"{total_time} {T['min']}")
+    perf.lap("schedule")
+
+    # ── 補上下載較慢的圖片（依完成順序；每個請求都有逾時，不會無限等待） ──
+    for future in as_completed(pending_images):
+        show_remote_image(pending_images[future], future.result())
+    perf.lap("image_wait")
 
 else:
-    st.info(T["select_one"])
\ No newline at end of file
+    st.info(T["select_one"])
+
+perf.finish()
+
+if profiling:
+    with st.sidebar.expander("⏱️ Profiling", expanded=True):
+        st.table(pd.DataFrame(get_profiler().summary()))
+        st.download_button("Download JSON", get_profiler().to_json(),
+                           file_name="profile.json", mime="application/json")
\ No newline at end of file
@@ -3,9 +3,10 @@ from pathlib import Path
 import pandas as pd
 import re
 import random
-import json
 from datetime import datetime
 
+from visits import VisitCounter
+
 # Set page configuration
 st.set_page_config(page_title="🧑‍🍳Chef Tai🛠️", layout="centered")
 
@@ -215,25 +216,21 @@ if header_path.exists():
 st.markdown(T["light_mode_tip"])
 
 # ── 訪客計數（用 session_state 確保每次 session 只計一次） ───────────────────
-visit_file   = Path(__file__).parent / 'visit_history.json'
-current_date = datetime.now().strftime("%Y-%m-%d")
+# 存在 SQLite：每次造訪 O(1) 寫入，今日 / 總數直接讀彙總計數；舊的 JSON 紀錄第一次啟動時匯入
+@st.cache_resource
+def get_visit_counter():
+    return VisitCounter(Path(__file__).parent / 'visit_history.sqlite3',
+                        legacy_json=Path(__file__).parent / 'visit_history.json')
 
-if visit_file.exists():
-    with open(visit_file, 'r') as f:
-        visit_data = json.load(f)
-else:
-    visit_data = {"visits": []}
+visit_counter = get_visit_counter()
+current_date  = datetime.now().strftime("%Y-%m-%d")
 
 # ★ Bug 修正：只在新 session 第一次執行時才記錄訪客
 if 'visit_counted' not in st.session_state:
     st.session_state.visit_counted = True
-    current_timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-    visit_data["visits"].append({"timestamp": current_timestamp})
-    with open(visit_file, 'w') as f:
-        json.dump(visit_data, f, indent=4)
+    visit_counter.record()
 
-total_visits = len(visit_data["visits"])
-today_visits = sum(1 for v in visit_data["visits"] if v["timestamp"].startswith(current_date))
+today_visits, total_visits = visit_counter.counts(current_date)
 st.markdown(f"**{T['today_visits']}：{today_visits} | {T['total_visits']}：{total_visits}**")
 
 # ── 標題 ─────────────────────────────────────────────────────────────────────
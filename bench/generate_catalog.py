@@ -0,0 +1,143 @@
+"""產生與正式資料庫相同結構（六張工作表）的合成食譜 workbook，用於大規模效能測試。
+
+    python bench/generate_catalog.py 10000 -o bench/.data/synthetic_10000.xlsx --seed 0
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    ("Dessert", "點心", [("American-style", "美式"), ("European-style", "歐式"), ("Japanese-style", "日式")]),
+    ("Main",    "主餐", [("Western-style", "西式"), ("Chinese-style", "中式"), ("Korean-style", "韓式")]),
+    ("Soup",    "湯品", [("Western-style", "西式"), ("Chinese-style", "中式")]),
+    ("Snack",   "小點", [("American-style", "美式"), ("Taiwanese-style", "台式")]),
+]
+METHODS     = ["Bake", "Fry", "Boil", "Steam", "Stir-fry", "Simmer"]
+UNITS       = ["g", "ml", "ea", "spoon"]
+PARTS       = [("Main", "主體"), ("Sauce", "醬汁"), ("Pastry", "餅皮"), ("Filling", "餡料"), ("Topping", "配料")]
+TOOLS       = [(f"Tool {i}", f"工具 {i}") for i in range(60)]
+INGREDIENTS = 800
+
+
+def _ids(prefix, n, width):
+    return [f"{prefix}{i:0{width}d}" for i in range(1, n + 1)]
+
+
+def generate_tables(n_recipes, seed=0):
+    """回傳 {工作表名稱: DataFrame}，欄位與 Recipe_Database_Corrected.xlsx 相同。"""
+    rng   = np.random.default_rng(seed)
+    width = max(3, len(str(n_recipes)))
+    recipe_ids = np.array(_ids("R", n_recipes, width))
+
+    # Recipes
+    cat_idx = rng.integers(len(CATEGORIES), size=n_recipes)
+    cats    = [CATEGORIES[c] for c in cat_idx]
+    subs    = [c[2][rng.integers(len(c[2]))] for c in cats]
+    recipes = pd.DataFrame({
+        "RecipeID":       recipe_ids,
+        "RecipeName":     [f"Recipe {i}" for i in range(1, n_recipes + 1)],
+        "RecipeName_zh":  [f"食譜 {i}" for i in range(1, n_recipes + 1)],
+        "Portion":        [f"{p} ea" for p in rng.integers(1, 9, size=n_recipes)],
+        "Method":         rng.choice(METHODS, size=n_recipes),
+        "Temperature":    [f"{t}C/{int(t * 9 / 5 + 32)}F" for t in rng.integers(120, 230, size=n_recipes)],
+        "Time":           rng.integers(5, 90, size=n_recipes).astype(float),
+        "ImageURL":       [f"images/{rid}.jpg" for rid in recipe_ids],
+        "Category":       [c[0] for c in cats],
+        "Category_zh":    [c[1] for c in cats],
+        "SubCategory":    [s[0] for s in subs],
+        "SubCategory_zh": [s[1] for s in subs],
+    })
+
+    # Components：每道食譜 1–3 個
+    n_comp        = rng.integers(1, 4, size=n_recipes)
+    comp_recipe   = np.repeat(recipe_ids, n_comp)
+    comp_ids      = np.array(_ids("C", len(comp_recipe), width + 1))
+    comp_part     = np.concatenate([rng.permutation(len(PARTS))[:k] for k in n_comp])
+    components = pd.DataFrame({
+        "ComponentID":      comp_ids,
+        "RecipeID":         comp_recipe,
+        "ComponentName":    [PARTS[p][0] for p in comp_part],
+        "ComponentName_zh": [PARTS[p][1] for p in comp_part],
+    })
+
+    # IngredientDict
+    ingredient_dict = pd.DataFrame({
+        "Ingredient":    [f"Ingredient {i}" for i in range(INGREDIENTS)],
+        "Ingredient_zh": [f"食材 {i}" for i in range(INGREDIENTS)],
+    })
+
+    # Ingredients：每個 component 2–8 種食材
+    n_ing    = rng.integers(2, 9, size=len(comp_ids))
+    total    = int(n_ing.sum())
+    ing_pick = rng.integers(INGREDIENTS, size=total)
+    ingredients = pd.DataFrame({
+        "RecipeID":    np.repeat(comp_recipe, n_ing),
+        "ComponentID": np.repeat(comp_ids, n_ing),
+        "Ingredient":  ingredient_dict["Ingredient"].to_numpy()[ing_pick],
+        "Amount":      np.round(rng.gamma(2.0, 40.0, size=total)),
+        "Unit":        np.array(UNITS)[ing_pick % len(UNITS)],
+        "Optional":    rng.random(total) < 0.1,
+    })
+
+    # Steps：每道食譜 4–12 步，依 component 的部位分段
+    n_steps    = rng.integers(4, 13, size=n_recipes)
+    step_total = int(n_steps.sum())
+    step_rec   = np.repeat(np.arange(n_recipes), n_steps)
+    step_order = np.arange(step_total) - np.repeat(np.cumsum(n_steps) - n_steps, n_steps) + 1
+    first_comp = np.cumsum(n_comp) - n_comp
+    part_of    = comp_part[first_comp[step_rec] + (step_order - 1) * n_comp[step_rec] // n_steps[step_rec]]
+    steps = pd.DataFrame({
+        "RecipeID":       recipe_ids[step_rec],
+        "StepOrder":      step_order,
+        "Part":           [PARTS[p][0] for p in part_of],
+        "Part_zh":        [PARTS[p][1] for p in part_of],
+        "Instruction_en": [f"Do step {o}; then check.\nNote: keep going." for o in step_order],
+        "Instruction_zh": [f"第 {o} 步；檢查。\n備註：繼續。" for o in step_order],
+        "CycleTime":      rng.integers(0, 31, size=step_total),
+        "Parallel":       rng.random(step_total) < 0.1,
+    })
+
+    # Tools：每道食譜 2–6 件
+    n_tools   = rng.integers(2, 7, size=n_recipes)
+    tool_pick = rng.integers(len(TOOLS), size=int(n_tools.sum()))
+    tools = pd.DataFrame({
+        "RecipeID":    np.repeat(recipe_ids, n_tools),
+        "ToolName":    [TOOLS[t][0] for t in tool_pick],
+        "ToolName_zh": [TOOLS[t][1] for t in tool_pick],
+        "Optional":    rng.random(len(tool_pick)) < 0.15,
+    })
+
+    return {
+        "Recipes":        recipes,
+        "Components":     components,
+        "Ingredients":    ingredients,
+        "IngredientDict": ingredient_dict,
+        "Steps":          steps,
+        "Tools":          tools,
+    }
+
+
+def write_workbook(tables, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, frame in tables.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic recipe workbook")
+    parser.add_argument("recipes", type=int, help="number of recipes")
+    parser.add_argument("-o", "--output", help="output .xlsx path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    output = args.output or Path(__file__).parent / ".data" / f"synthetic_{args.recipes}_{args.seed}.xlsx"
+    path = write_workbook(generate_tables(args.recipes, args.seed), output)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
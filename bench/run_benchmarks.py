@@ -0,0 +1,169 @@
+"""載入 / 篩選 / BoM / 採購 / 步驟表渲染的效能測試，結果寫成 JSON 方便比較回歸。
+
+    python bench/run_benchmarks.py --scales 1000 10000 100000 -o bench_results.json
+    python bench/run_benchmarks.py --scales 1000 --baseline bench_results.json
+
+合成 workbook 會快取在 bench/.data/，同一規模與 seed 只產生一次。
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench.generate_catalog import generate_tables, write_workbook  # noqa: E402
+from catalog import Catalog, load_tables, parse_workbook            # noqa: E402
+from catalog_db import CatalogDB, DBCatalog, import_workbook        # noqa: E402
+from sequence import render_sequence_html                            # noqa: E402
+
+DATA_DIR = Path(__file__).parent / ".data"
+
+
+# ── 與 app.py 相同的熱路徑 ───────────────────────────────────────────────────
+def filter_recipes(catalog, category, subcategory, lang="English"):
+    return list(catalog.facets.recipe_names(lang, category, subcategory))
+
+
+def build_bom(catalog, recipe_id, mult):
+    return [catalog.bom.table(recipe_id, comp, "English", mult)
+            for comp, _ in catalog.bom.components(recipe_id, "English")]
+
+
+def render_steps(catalog, recipe_id):
+    # 不經過 Catalog 的 HTML 快取，量的是第一次渲染的成本
+    return render_sequence_html(catalog.recipe_steps(recipe_id), "English")
+
+
+# ── 計時 ─────────────────────────────────────────────────────────────────────
+def measure(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(times), "min_s": min(times), "repeats": repeats}
+
+
+def synthetic_workbook(n_recipes, seed):
+    path = DATA_DIR / f"synthetic_{n_recipes}_{seed}.xlsx"
+    if not path.exists():
+        write_workbook(generate_tables(n_recipes, seed), path)
+    return path
+
+
+def run_scale(n_recipes, seed, repeats, skip_parse=False):
+    workbook = synthetic_workbook(n_recipes, seed)
+    results  = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if not skip_parse:
+            results["load.parse_workbook"] = measure(lambda: parse_workbook(workbook), 1)
+        load_tables(workbook, cache_dir)   # 寫入快照
+        results["load.snapshot"] = measure(lambda: load_tables(workbook, cache_dir), repeats)
+        tables = load_tables(workbook, cache_dir)
+        results["load.catalog_build"] = measure(lambda: Catalog(*tables), 1)
+        catalog = Catalog(*tables)
+
+        rng      = np.random.default_rng(seed)
+        sample   = list(rng.choice(catalog.recipes["RecipeID"].to_numpy(), size=5, replace=False))
+        big_pick = list(rng.choice(catalog.recipes["RecipeID"].to_numpy(),
+                                   size=min(100, len(catalog.recipes)), replace=False))
+        category, subcategory = catalog.recipes[["Category", "SubCategory"]].iloc[0]
+
+        results["filter.category"] = measure(
+            lambda: filter_recipes(catalog, category, subcategory), repeats)
+        results["bom.recipe_x5"] = measure(
+            lambda: [build_bom(catalog, rid, 2.0) for rid in sample], repeats)
+        results["procurement.totals_x5"] = measure(
+            lambda: catalog.quantities["Ingredient"].totals({rid: 2.0 for rid in sample}), repeats)
+        results["procurement.totals_x100"] = measure(
+            lambda: catalog.quantities["Ingredient"].totals({rid: 2.0 for rid in big_pick}), repeats)
+        matrix = catalog.quantities["Ingredient"]
+        pantry = {key: 500.0 for key in zip(matrix.columns["Ingredient"], matrix.columns["Unit"])}
+        results["pantry.max_batches"] = measure(lambda: matrix.max_batches(pantry), repeats)
+        index  = catalog.ingredient_index
+        common = index.ingredients("English")[:3]
+        results["ingredients.search"]   = measure(
+            lambda: index.search("English", all_of=common[:1], any_of=common[1:], none_of=common[2:]), repeats)
+        results["ingredients.cookable"] = measure(lambda: index.cookable("English", common, 2), repeats)
+        results["similarity.lookup_x5"] = measure(
+            lambda: [catalog.similarity.similar(rid) for rid in sample], repeats)
+        results["steps.render_x5"] = measure(
+            lambda: [render_steps(catalog, rid) for rid in sample], repeats)
+        for rid in sample:
+            catalog.sequence_html(rid, "English")   # 先填快取
+        results["steps.render_cached_x5"] = measure(
+            lambda: [catalog.sequence_html(rid, "English") for rid in sample], repeats)
+
+        # SQLite 後端：匯入、建立 DBCatalog（只讀 recipes 表與食材欄位），以及逐食譜查詢（不經快取）
+        db_path = Path(cache_dir) / "recipes.sqlite3"
+        if not skip_parse:
+            results["db.import"] = measure(lambda: import_workbook(workbook, db_path, force=True), 1)
+        import_workbook(workbook, db_path)
+        results["db.catalog_build"] = measure(lambda: DBCatalog(db_path), 1)
+        db = CatalogDB(db_path)
+        results["db.ingredients_x5"] = measure(lambda: [db.ingredients([rid]) for rid in sample], repeats)
+        results["db.steps_x5"]       = measure(lambda: [db.steps([rid]) for rid in sample], repeats)
+    return results
+
+
+def compare(current, baseline, max_slowdown):
+    """印出與 baseline 的比值；回傳超過 max_slowdown 的項目數。"""
+    regressions = 0
+    for scale, results in current["results"].items():
+        for name, stats in results.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            if not old:
+                continue
+            ratio = stats["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+            flag  = "  REGRESSION" if ratio > max_slowdown else ""
+            regressions += bool(flag)
+            print(f"{scale:>8} {name:<28} {old['median_s'] * 1e3:10.2f}ms -> "
+                  f"{stats['median_s'] * 1e3:10.2f}ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recipe app hot paths")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--skip-parse", action="store_true", help="skip the cold xlsx parse timing")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python":    platform.python_version(),
+            "pandas":    pd.__version__,
+            "numpy":     np.__version__,
+            "seed":      args.seed,
+        },
+        "results": {},
+    }
+    for n in args.scales:
+        report["results"][str(n)] = run_scale(n, args.seed, args.repeats, args.skip_parse)
+        for name, stats in report["results"][str(n)].items():
+            print(f"{n:>8} {name:<28} {stats['median_s'] * 1e3:10.2f}ms")
+    Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(report, baseline, args.max_slowdown):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""離線圖片打包：把 workbook 內所有遠端 ImageURL 下載到 images/，並輸出改指向本地檔的 workbook。
+
+圖片託管是部署時的選擇：打包後的 workbook 搭配 images/ 目錄部署，
+app 在處理請求時完全不需要對外連線。
+
+    python bundle_images.py Recipe_Database_Corrected_imgur.xlsx -o Recipe_Database_Corrected.xlsx
+
+相簿 / gallery 網址會先解析成直連圖片；所有下載同時進行，經 .cache/images 的磁碟快取，
+重跑只會下載新增或之前失敗的網址。圖片存成 images/<內容 sha256 前 16 碼>.webp，
+同一張圖被多道食譜使用也只存一份。下載失敗的網址保留原值，並以結束碼 1 回報。
+"""
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import openpyxl
+
+from image_cache import IMAGE_CACHE_DIR, AlbumResolver, ImageCache
+from image_prefetch import MAX_WORKERS, ImagePrefetcher, make_session
+from image_variants import SUFFIX, encode_variant
+
+BUNDLE_WIDTH = 1000   # 本地檔的寬度；app 顯示用的 500 寬變體再由此產生
+
+
+def _image_url_cells(sheet):
+    header = [cell.value for cell in sheet[1]]
+    col = header.index("ImageURL") + 1
+    return [row[0] for row in sheet.iter_rows(min_row=2, min_col=col, max_col=col)]
+
+
+def store_image(data, images_dir, width=BUNDLE_WIDTH):
+    """縮圖、重新壓縮後以內容雜湊命名存入 images_dir，回傳檔案路徑（已存在則直接沿用）。"""
+    path = Path(images_dir) / f"{hashlib.sha256(data).hexdigest()[:16]}{SUFFIX}"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(encode_variant(data, width))
+        os.replace(tmp, path)
+    return path
+
+
+def bundle_workbook(workbook, output, images_dir=None, prefetcher=None, width=BUNDLE_WIDTH):
+    """下載 Recipes 工作表中的遠端圖片並寫出新的 workbook。
+
+    images_dir 預設為輸出 workbook 旁的 images/；寫回的路徑相對於輸出 workbook 所在目錄，
+    與 app 以 Path(__file__).parent / ImageURL 讀圖的方式一致。
+    回傳 ({網址: 本地路徑}, {網址: 錯誤訊息})。
+    """
+    output     = Path(output)
+    images_dir = Path(images_dir) if images_dir else output.parent / "images"
+    prefetcher = prefetcher or ImagePrefetcher(ImageCache(), AlbumResolver(), make_session())
+
+    book  = openpyxl.load_workbook(workbook)
+    cells = _image_url_cells(book["Recipes"])
+    urls  = sorted({c.value.strip() for c in cells if isinstance(c.value, str) and c.value.strip().startswith("http")})
+
+    local, failed = {}, {}
+    for future in as_completed(prefetcher.prefetch(urls).values()):
+        fetched = future.result()
+        if fetched.data is None:
+            failed[fetched.url] = fetched.error
+            continue
+        try:
+            path = store_image(fetched.data, images_dir, width)
+        except OSError as e:   # 不是圖片或無法解碼
+            failed[fetched.url] = str(e)
+            continue
+        local[fetched.url] = Path(os.path.relpath(path, output.parent)).as_posix()
+
+    for cell in cells:
+        if isinstance(cell.value, str) and cell.value.strip() in local:
+            cell.value = local[cell.value.strip()]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    book.save(output)
+    return local, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download every remote ImageURL and write a local-image workbook")
+    parser.add_argument("workbook")
+    parser.add_argument("-o", "--output", help="output workbook (default: <workbook>_local.xlsx)")
+    parser.add_argument("--images-dir", help="where to store images (default: images/ next to the output)")
+    parser.add_argument("--width", type=int, default=BUNDLE_WIDTH)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--cache-dir", default=str(IMAGE_CACHE_DIR))
+    args = parser.parse_args(argv)
+
+    workbook = Path(args.workbook)
+    output   = Path(args.output) if args.output else workbook.with_name(f"{workbook.stem}_local.xlsx")
+    prefetcher = ImagePrefetcher(ImageCache(args.cache_dir), AlbumResolver(args.cache_dir),
+                                 make_session(args.workers), max_workers=args.workers)
+    local, failed = bundle_workbook(workbook, output, args.images_dir, prefetcher, args.width)
+    for url, path in sorted(local.items()):
+        print(f"{url} -> {path}")
+    for url, error in sorted(failed.items()):
+        print(f"{url} FAILED: {error}", file=sys.stderr)
+    print(f"{len(local)} images bundled, {len(failed)} failed -> {output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
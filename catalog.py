@@ -0,0 +1,293 @@
+"""食譜資料庫載入：解析 xlsx、合併各工作表，並以 workbook 指紋快取成 Arrow 快照。"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from facets import FacetIndex
+from ingredient_index import IngredientIndex
+from procurement import BillOfMaterials, QuantityMatrix
+from sampler import SurpriseSampler
+from sequence import render_sequence_html
+from similarity import SimilarityIndex
+from subrecipes import explode_subrecipes
+from units import canonical_amounts
+
+BASE_DIR        = Path(__file__).parent
+EXCEL_PATH      = BASE_DIR / "Recipe_Database_Corrected.xlsx"
+SNAPSHOT_DIR    = BASE_DIR / ".cache" / "catalog"
+SNAPSHOT_FORMAT = 3   # 快照內容格式（2：字串鍵為 categorical；3：子食譜引用已展開）；改版時舊快照自動失效
+TABLES          = ("merged", "recipes", "steps", "tools")
+TOOLS_COLUMNS   = ["RecipeID", "ToolName", "ToolName_zh", "Optional"]
+SIMILARITY_FILE = "similarity.npz"   # 相似料理鄰居表，放在快照目錄下
+
+
+# ── xlsx 解析 ────────────────────────────────────────────────────────────────
+SHEETS = ("Recipes", "Components", "Ingredients", "IngredientDict", "Steps", "Tools")
+# merged 表中每列重複的字串欄位，改存成 categorical（整數代碼 + 字典表）
+CATEGORY_COLUMNS = [
+    "RecipeID", "ComponentID", "ComponentName", "ComponentName_zh",
+    "Ingredient", "Ingredient_zh", "Unit",
+    "RecipeName", "RecipeName_zh", "Category", "Category_zh", "SubCategory", "SubCategory_zh",
+    "Portion", "Method", "Temperature", "ImageURL",
+]
+
+
+def read_sheets(excel_path=EXCEL_PATH):
+    """讀取六張工作表（{名稱: DataFrame}），食譜名稱去掉 ** 標記；沒有 Tools 時補空表。"""
+    raw = pd.read_excel(excel_path, sheet_name=None)
+    raw.setdefault("Tools", pd.DataFrame(columns=TOOLS_COLUMNS))
+    recipes = raw["Recipes"]
+    recipes["RecipeName"]    = recipes["RecipeName"].str.replace(r'\*\*', '', regex=True)
+    recipes["RecipeName_zh"] = recipes["RecipeName_zh"].str.replace(r'\*\*', '', regex=True)
+    return {name: raw[name] for name in SHEETS}
+
+
+def encode_categories(frame, columns=CATEGORY_COLUMNS):
+    """把重複的字串欄位轉成 categorical：比較與 groupby 都在整數代碼上進行，記憶體也小得多。
+
+    分類依字串排序，groupby 的輸出順序與原本的字串欄位相同；groupby 時需指定 observed=True。
+    """
+    frame = frame.copy()
+    for col in columns:
+        if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+def merge_ingredients(sheets):
+    """食材列併入 component / 食譜 / 食材字典的欄位（字串欄位維持原樣）。
+
+    食材欄引用其他 component / 食譜的列先展開成原料（見 subrecipes.py）。
+    """
+    return (
+        explode_subrecipes(sheets["Ingredients"], sheets["Components"])
+        .merge(sheets["Components"].drop(columns=["RecipeID"]), on="ComponentID", how="left")
+        .merge(sheets["Recipes"],        on="RecipeID",   how="left")
+        .merge(sheets["IngredientDict"], on="Ingredient", how="left")
+    )
+
+
+def merge_sheets(sheets):
+    """六張工作表 → (merged, recipes, steps, tools)；merged 與 recipes 的字串鍵為 categorical。"""
+    merged = merge_ingredients(sheets)
+    return encode_categories(merged), encode_categories(sheets["Recipes"]), sheets["Steps"], sheets["Tools"]
+
+
+def parse_workbook(excel_path=EXCEL_PATH):
+    """讀取六張工作表並合併成 (merged, recipes, steps, tools)。"""
+    return merge_sheets(read_sheets(excel_path))
+
+
+# ── Workbook 指紋 ────────────────────────────────────────────────────────────
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def workbook_fingerprint(excel_path=EXCEL_PATH, cache_dir=SNAPSHOT_DIR):
+    """回傳 workbook 內容的 sha256。
+
+    size / mtime 與上次記錄相同時直接沿用舊的雜湊值，不重讀檔案；
+    只有檔案被動過時才重新計算。
+    """
+    excel_path = Path(excel_path)
+    stat = excel_path.stat()
+    manifest_path = Path(cache_dir) / "manifest.json"
+    key = str(excel_path.resolve())
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    entry = manifest.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = _sha256(excel_path)
+    manifest[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, manifest_path)
+    except OSError:
+        pass
+    return digest
+
+
+# ── Arrow 快照 ───────────────────────────────────────────────────────────────
+def _snapshot_path(cache_dir, digest):
+    return Path(cache_dir) / f"{digest[:16]}-v{SNAPSHOT_FORMAT}"
+
+
+def read_snapshot(cache_dir, digest):
+    """讀取指紋對應的快照；不存在或損毀時回傳 None。"""
+    path = _snapshot_path(cache_dir, digest)
+    try:
+        return tuple(feather.read_feather(path / f"{name}.arrow") for name in TABLES)
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def write_snapshot(cache_dir, digest, tables):
+    """寫入快照（先寫暫存目錄再整個換上），並清掉舊指紋的快照。"""
+    cache_dir = Path(cache_dir)
+    path = _snapshot_path(cache_dir, digest)
+    tmp = cache_dir / f".{path.name}.{os.getpid()}.tmp"
+    try:
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name, frame in zip(TABLES, tables):
+            feather.write_feather(frame.reset_index(drop=True), tmp / f"{name}.arrow",
+                                  compression="uncompressed")
+        if path.exists():
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    except (OSError, pa.ArrowException):
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    for old in cache_dir.iterdir():
+        if old.is_dir() and old.name != path.name and not old.name.startswith("."):
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def load_tables(excel_path=EXCEL_PATH, cache_dir=SNAPSHOT_DIR):
+    """回傳 (merged, recipes, steps, tools)；指紋相符時直接讀快照，否則解析 xlsx 並寫入快照。"""
+    digest = workbook_fingerprint(excel_path, cache_dir)
+    tables = read_snapshot(cache_dir, digest)
+    if tables is None:
+        tables = parse_workbook(excel_path)
+        write_snapshot(cache_dir, digest, tables)
+    return tables
+
+
+# ── 食譜索引 ─────────────────────────────────────────────────────────────────
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _positions(frame, keys):
+    if frame.empty or any(k not in frame.columns for k in keys):
+        return {}
+    return frame.groupby(keys, sort=False, observed=True).indices
+
+
+class RecipeIndex:
+    """RecipeID → 各表列位置的索引，查詢單一食譜只需 O(該食譜列數)。
+
+    只存位置（numpy array），不持有 DataFrame；查詢時傳入建索引時的同一張表。
+    """
+
+    def __init__(self, merged, recipes, steps, tools):
+        self._ingredients = _positions(merged, ["RecipeID"])
+        self._steps       = _positions(steps,  ["RecipeID"])
+        self._tools       = _positions(tools,  ["RecipeID"])
+
+    def ingredients(self, merged, recipe_id):
+        return merged.iloc[self._ingredients.get(recipe_id, _NO_ROWS)]
+
+    def steps(self, steps, recipe_id):
+        return steps.iloc[self._steps.get(recipe_id, _NO_ROWS)]
+
+    def tools(self, tools, recipe_id):
+        return tools.iloc[self._tools.get(recipe_id, _NO_ROWS)]
+
+    def steps_of(self, steps, recipe_ids):
+        return steps.iloc[self._concat(self._steps, recipe_ids)]
+
+    def tools_of(self, tools, recipe_ids):
+        return tools.iloc[self._concat(self._tools, recipe_ids)]
+
+    @staticmethod
+    def _concat(positions, recipe_ids):
+        parts = [positions[rid] for rid in recipe_ids if rid in positions]
+        return np.concatenate(parts) if parts else _NO_ROWS
+
+
+# ── 共用目錄物件 ─────────────────────────────────────────────────────────────
+RECIPE_NAME_COLUMNS = {"中文": "RecipeName_zh", "English": "RecipeName"}
+
+
+def recipe_ids_by_name(recipes):
+    """顯示名稱欄 → {名稱: RecipeID}（同名時取第一筆）。"""
+    return {
+        col: dict(zip(recipes[col].iloc[::-1], recipes["RecipeID"].iloc[::-1]))
+        for col in ("RecipeName", "RecipeName_zh") if col in recipes.columns
+    }
+
+
+class Catalog:
+    """整份食譜目錄與載入時預先算好的結構。
+
+    建立後視為唯讀：由 st.cache_resource 在同一 process 的所有 session 間共用，
+    不會每次 rerun 都反序列化、複製一份 DataFrame。呼叫端不可修改其中的表格。
+    唯一會變的是渲染結果的記憶快取，內容只由表格決定，不影響共用。
+    """
+
+    def __init__(self, merged, recipes, steps, tools, similarity_path=None):
+        self.merged  = merged
+        self.recipes = recipes
+        self.steps   = steps
+        self.tools   = tools
+        self.index   = RecipeIndex(merged, recipes, steps, tools)
+        # 各食譜 component 的基礎 BoM（倍率 1）
+        self.bom = BillOfMaterials(merged)
+        self._build_indexes(merged, recipes, similarity_path)
+        self._sequence_html = {}
+
+    def _build_indexes(self, rows, recipes, similarity_path):
+        """整份目錄共用的索引；rows 只用到食材相關欄位（RecipeID、Ingredient(_zh)、Amount、Unit、Optional 等）。"""
+        # 類別 / 風格篩選與驚喜挑選用的 facet 索引
+        self.facets  = FacetIndex(recipes)
+        self.sampler = SurpriseSampler(self.facets)
+        # 依食材搜尋：食材 → 食譜 bitset
+        self.ingredient_index = IngredientIndex(rows, recipes)
+        # 採購用的食譜 × 食材數量矩陣，中英文各一份（中文依 Ingredient_zh 合併）；
+        # 數量先換成各食材共同的基準單位，同一食材不會因單位不同分成多行
+        canonical = canonical_amounts(rows)
+        self.quantities = {col: QuantityMatrix(canonical, col) for col in ("Ingredient", "Ingredient_zh")}
+        # 相似料理：各食譜前 k 個食材比例最接近的食譜；有 similarity_path 時只重算變動的食譜
+        self.similarity = SimilarityIndex(canonical, path=similarity_path)
+        # 各語言的食譜顯示名稱：RecipeID → 名稱；以及反查用的 名稱 → RecipeID
+        self.recipe_names = {
+            lang: dict(zip(recipes["RecipeID"], recipes[col]))
+            for lang, col in RECIPE_NAME_COLUMNS.items()
+        }
+        self._ids_by_name = recipe_ids_by_name(recipes)
+
+    # ── 單一食譜的資料列（catalog_db.DBCatalog 以資料庫查詢實作同一組方法） ──
+    def recipe_id(self, name, display_col):
+        return self._ids_by_name.get(display_col, {}).get(name)
+
+    def recipe_ingredients(self, recipe_id):
+        return self.index.ingredients(self.merged, recipe_id)
+
+    def recipe_steps(self, recipe_id):
+        return self.index.steps(self.steps, recipe_id)
+
+    def recipe_tools(self, recipe_id):
+        return self.index.tools(self.tools, recipe_id)
+
+    def steps_of(self, recipe_ids):
+        return self.index.steps_of(self.steps, recipe_ids)
+
+    def tools_of(self, recipe_ids):
+        return self.index.tools_of(self.tools, recipe_ids)
+
+    def sequence_html(self, recipe_id, lang):
+        """生產流程表格的 HTML，每個 (RecipeID, 語言) 只渲染一次；無步驟資料時為 None。"""
+        key = (recipe_id, lang)
+        if key not in self._sequence_html:
+            self._sequence_html[key] = render_sequence_html(self.recipe_steps(recipe_id), lang)
+        return self._sequence_html[key]
+
+
+def load_catalog(excel_path=EXCEL_PATH, cache_dir=SNAPSHOT_DIR):
+    return Catalog(*load_tables(excel_path, cache_dir), similarity_path=Path(cache_dir) / SIMILARITY_FILE)
@@ -0,0 +1,290 @@
+"""SQLite 食譜資料庫：xlsx 仍是編輯用的格式，匯入成有索引的 SQLite，app 只查需要的列。
+
+    python catalog_db.py import [Recipe_Database_Corrected.xlsx] [--db recipes.sqlite3] [--force]
+
+匯入時記下 workbook 指紋，內容沒變就不重做；先寫暫存檔再整個換上，
+讀取端（包括正在執行的 app）不會看到匯入一半的資料。
+
+app 設定環境變數 RECIPE_CATALOG_DB=<資料庫路徑> 即改用 DBCatalog：
+  • 常駐記憶體的只有 recipes 表（facet、驚喜挑選、名稱）與整份目錄的精簡索引
+    （食材 bitset、採購矩陣、相似料理）；建索引時只掃食材相關的欄位，掃完即丟
+  • 單一食譜的食材 / 步驟 / 工具在渲染時才經 RecipeID / ComponentID 索引查詢，
+    子食譜引用一層層查出來後照 merge_ingredients 展開；最近用到的食譜留在 LRU 快取
+  • 不走 Arrow 快照：database_version()（資料庫與 WAL 檔的 mtime / 大小）一變，
+    app 就重新建立 DBCatalog，直接在 SQLite 裡改的資料也會被讀到
+"""
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from catalog import (EXCEL_PATH, SIMILARITY_FILE, SNAPSHOT_DIR, Catalog, encode_categories,
+                     merge_ingredients, read_sheets, workbook_fingerprint)
+from procurement import BillOfMaterials
+from sequence import render_sequence_html
+from subrecipes import explode_subrecipes
+
+DB_PATH = Path(__file__).parent / "recipes.sqlite3"
+
+# (工作表, 欄位)：CatalogDB 逐食譜查詢用到的索引（類別篩選走常駐的 facet 索引，不查資料庫）
+INDEXES = [
+    ("Recipes",        ["RecipeID"]),
+    ("Components",     ["ComponentID"]),
+    ("Ingredients",    ["RecipeID"]),
+    ("Ingredients",    ["ComponentID"]),
+    ("IngredientDict", ["Ingredient"]),
+    ("Steps",          ["RecipeID", "StepOrder"]),
+    ("Tools",          ["RecipeID"]),
+]
+BOOL_COLUMNS   = ("Optional", "Parallel")   # SQLite 存成 0 / 1，讀回時轉回 bool
+MAX_PARAMS     = 900                        # 每次 IN (...) 的參數上限
+ROW_CACHE_SIZE = 256                        # DBCatalog 保留最近幾道食譜的查詢結果
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _restore_bools(frame):
+    # 有空值的欄位維持 1.0 / 0.0 / NaN，真假判斷與 xlsx 讀進來的 True / False / NaN 相同
+    for col in BOOL_COLUMNS:
+        if col in frame.columns and frame[col].notna().all():
+            frame[col] = frame[col].astype(bool)
+    return frame
+
+
+# ── 匯入 ─────────────────────────────────────────────────────────────────────
+def imported_fingerprint(db_path=DB_PATH):
+    """資料庫目前內容對應的 workbook 指紋；尚未匯入時回傳 None。"""
+    try:
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def import_workbook(excel_path=EXCEL_PATH, db_path=DB_PATH, force=False):
+    """把 workbook 匯入 SQLite；內容與上次匯入相同時略過。回傳是否有重新匯入。"""
+    db_path = Path(db_path)
+    digest  = workbook_fingerprint(excel_path)
+    if not force and imported_fingerprint(db_path) == digest:
+        return False
+
+    sheets = read_sheets(excel_path)
+    tmp = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        with closing(sqlite3.connect(tmp)) as conn:
+            for name, frame in sheets.items():
+                frame.to_sql(name, conn, index=False)
+            for table, cols in INDEXES:
+                if all(c in sheets[table].columns for c in cols):
+                    conn.execute(f"CREATE INDEX {_quote('idx_' + table + '_' + '_'.join(cols))} "
+                                 f"ON {_quote(table)}({', '.join(map(_quote, cols))})")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("fingerprint", digest),
+                ("source",      str(Path(excel_path).resolve())),
+                ("imported_at", datetime.now().isoformat(timespec="seconds")),
+            ])
+            conn.commit()
+        os.replace(tmp, db_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return True
+
+
+def database_version(db_path=DB_PATH):
+    """資料庫檔案與 WAL 檔的 (mtime, 大小)；重新匯入或直接修改資料庫都會改變。"""
+    version = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            stat = path.stat()
+        except OSError:
+            version.append(None)
+        else:
+            version.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+# ── 查詢 ─────────────────────────────────────────────────────────────────────
+class CatalogDB:
+    """唯讀查詢介面：每次查詢開新連線，可在多個 thread / session 間共用。"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"{self.db_path} not found; run: python catalog_db.py import")
+        # 各表的 REAL 欄位：查到的列全是 NULL 時 pandas 會讀成 None，轉回 float 才與整表讀取一致
+        with closing(self._connect()) as conn:
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            self._real_columns = {
+                table: [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})") if row[2] == "REAL"]
+                for table in tables
+            }
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return _restore_bools(pd.read_sql_query(sql, conn, params=list(params)))
+
+    @staticmethod
+    def _fetch(conn, sql, values):
+        """sql 中的每個 {} 換成 values 的佔位符，參數過多時分批；回傳原始 tuple。"""
+        values, rows = list(values), []
+        per_chunk = MAX_PARAMS // max(sql.count("{}"), 1)
+        for i in range(0, len(values), per_chunk):
+            chunk = values[i:i + per_chunk]
+            marks = ", ".join("?" * len(chunk))
+            rows += conn.execute(sql.replace("{}", marks), chunk * sql.count("{}")).fetchall()
+        return rows
+
+    def rows(self, table, column, values, columns="*"):
+        """table 中 column 在 values 內的列（走該欄的索引），依原表順序；帶 _rowid 欄供合併多次查詢。
+
+        參數過多時分批查詢再接起來。
+        """
+        values = list(dict.fromkeys(v for v in values if pd.notna(v)))
+        sql    = f"SELECT rowid AS _rowid, {columns} FROM {_quote(table)}"
+        frames = [
+            self._query(f"{sql} WHERE {_quote(column)} IN ({', '.join('?' * len(chunk))})", chunk)
+            for chunk in (values[i:i + MAX_PARAMS] for i in range(0, len(values), MAX_PARAMS))
+        ] or [self._query(f"{sql} WHERE 0")]
+        frame = pd.concat(frames, ignore_index=True).sort_values("_rowid", kind="stable", ignore_index=True)
+        for col in self._real_columns.get(table, []):
+            if col in frame.columns and frame[col].dtype == object:
+                frame[col] = frame[col].astype(float)
+        return frame
+
+    @staticmethod
+    def _in_order(frame, recipe_ids):
+        """依 recipe_ids 的順序排列（同一食譜內維持原表順序），與 RecipeIndex 的 *_of 相同。"""
+        rank  = {rid: i for i, rid in enumerate(recipe_ids)}
+        order = frame["RecipeID"].map(rank).to_numpy()
+        return frame.iloc[order.argsort(kind="stable")].drop(columns="_rowid").reset_index(drop=True)
+
+    def recipes(self):
+        frame = self._query("SELECT * FROM Recipes ORDER BY rowid")
+        return encode_categories(frame)
+
+    def ingredient_columns(self):
+        """整份目錄的食材列，只有建目錄索引需要的欄位（子食譜引用已展開，併入 IngredientDict）。"""
+        ingredients = self._query("SELECT * FROM Ingredients ORDER BY rowid")
+        components  = self._query("SELECT ComponentID, RecipeID FROM Components ORDER BY rowid")
+        dictionary  = self._query("SELECT * FROM IngredientDict ORDER BY rowid")
+        rows = explode_subrecipes(ingredients, components).merge(dictionary, on="Ingredient", how="left")
+        return encode_categories(rows)
+
+    def ingredients(self, recipe_ids):
+        """指定食譜的 merged 列，內容與 catalog.merge_sheets 的結果相同（子食譜引用已展開）。
+
+        被引用的 component / 食譜一層層往下查（走 ComponentID / RecipeID 索引），直到沒有新的引用，
+        再把查到的列交給 merge_ingredients。列數很少，字串欄位不轉 categorical。
+        """
+        recipe_ids = list(dict.fromkeys(recipe_ids))
+        # 先只取 (rowid, ComponentID, Ingredient) 找出所有要用到的列，最後再一次讀成 DataFrame
+        with closing(self._connect()) as conn:
+            found = self._fetch(conn, "SELECT rowid, ComponentID, Ingredient FROM Ingredients "
+                                      "WHERE RecipeID IN ({})", recipe_ids)
+            rowids = {row[0] for row in found}
+            seen   = set(recipe_ids) | {row[1] for row in found if row[1] is not None}
+            while True:
+                names = {str(row[2]).strip() for row in found if row[2] is not None} - seen
+                if not names:
+                    break
+                seen |= names
+                found = [row for row in self._fetch(conn, "SELECT rowid, ComponentID, Ingredient FROM Ingredients "
+                                                          "WHERE RecipeID IN ({}) OR ComponentID IN ({})", names)
+                         if row[0] not in rowids]
+                rowids |= {row[0] for row in found}
+        ingredients = self.rows("Ingredients", "rowid", rowids).drop(columns="_rowid")
+
+        # component 依 ComponentID 併入（與整表 merge 相同）；被引用到的名稱也要查，供判斷是否為引用
+        components = self.rows("Components", "ComponentID", seen | set(ingredients["ComponentID"].dropna()))
+        sheets = {
+            "Recipes":        self.rows("Recipes", "RecipeID", recipe_ids).drop(columns="_rowid"),
+            "Components":     components.drop(columns="_rowid"),
+            "Ingredients":    ingredients,
+            "IngredientDict": self.rows("IngredientDict", "Ingredient", ingredients["Ingredient"])
+                                  .drop(columns="_rowid"),
+        }
+        merged = merge_ingredients(sheets)
+        # 被引用的 component / 食譜自己的列只是展開用，不屬於這些食譜
+        return merged[merged["RecipeID"].isin(recipe_ids)].reset_index(drop=True)
+
+    def steps(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        return self._in_order(self.rows("Steps", "RecipeID", recipe_ids), recipe_ids)
+
+    def tools(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        return self._in_order(self.rows("Tools", "RecipeID", recipe_ids), recipe_ids)
+
+
+class _RecipeBoM:
+    """BillOfMaterials 的介面；查詢到該食譜的列時才建表，最近用到的留在快取。"""
+
+    def __init__(self, rows_of):
+        self._bom_of = lru_cache(maxsize=ROW_CACHE_SIZE)(lambda rid: BillOfMaterials(rows_of(rid)))
+
+    def components(self, recipe_id, lang):
+        return self._bom_of(recipe_id).components(recipe_id, lang)
+
+    def table(self, recipe_id, component_name, lang, mult=1.0):
+        return self._bom_of(recipe_id).table(recipe_id, component_name, lang, mult)
+
+
+class DBCatalog(Catalog):
+    """以資料庫為來源的 Catalog：介面相同，但不持有 merged / steps / tools 整張表。
+
+    建立後同樣唯讀、由 st.cache_resource 共用；資料庫有變動時由呼叫端重新建立（見 database_version）。
+    """
+
+    def __init__(self, db_path=DB_PATH, similarity_path=None):
+        self.db      = CatalogDB(db_path)
+        self.recipes = self.db.recipes()
+        self._build_indexes(self.db.ingredient_columns(), self.recipes, similarity_path)
+        self.recipe_ingredients = lru_cache(maxsize=ROW_CACHE_SIZE)(lambda rid: self.db.ingredients([rid]))
+        self.recipe_steps       = lru_cache(maxsize=ROW_CACHE_SIZE)(lambda rid: self.db.steps([rid]))
+        self.recipe_tools       = lru_cache(maxsize=ROW_CACHE_SIZE)(lambda rid: self.db.tools([rid]))
+        self.sequence_html      = lru_cache(maxsize=ROW_CACHE_SIZE)(
+            lambda rid, lang: render_sequence_html(self.recipe_steps(rid), lang))
+        self.bom = _RecipeBoM(self.recipe_ingredients)
+
+    def steps_of(self, recipe_ids):
+        return self.db.steps(recipe_ids)
+
+    def tools_of(self, recipe_ids):
+        return self.db.tools(recipe_ids)
+
+
+def load_catalog_db(db_path=DB_PATH, cache_dir=SNAPSHOT_DIR):
+    return DBCatalog(db_path, similarity_path=Path(cache_dir) / SIMILARITY_FILE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recipe catalog SQLite backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import (or re-sync) the xlsx workbook into SQLite")
+    imp.add_argument("workbook", nargs="?", default=str(EXCEL_PATH))
+    imp.add_argument("--db", default=str(DB_PATH))
+    imp.add_argument("--force", action="store_true", help="re-import even if the workbook is unchanged")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        if import_workbook(args.workbook, args.db, args.force):
+            print(f"imported {args.workbook} -> {args.db}")
+        else:
+            print(f"{args.db} is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""類別 / 風格篩選的 facet 索引：載入時一次算好，篩選下拉選單與食譜清單都只剩 dict 查詢。
+
+每個語言各有：
+  • 排序好的類別清單
+  • 類別 → 風格清單（'All' → 全部風格）
+  • (類別, 風格) → 符合的食譜列位置（'All' 代表不限），以及依列順序去重的顯示名稱
+"""
+import numpy as np
+import pandas as pd
+
+ALL = "All"
+
+# 語言 → (類別欄, 風格欄, 顯示名稱欄)
+FACET_COLUMNS = {
+    "中文":    ("Category_zh", "SubCategory_zh", "RecipeName_zh"),
+    "English": ("Category",    "SubCategory",    "RecipeName"),
+}
+
+
+def _sorted_values(series):
+    return sorted(series.dropna().unique())
+
+
+class FacetIndex:
+    def __init__(self, recipes):
+        self._categories    = {}
+        self._subcategories = {}
+        self._positions     = {}
+        self._names         = {}   # 各語言每列的顯示名稱
+        self._name_lists    = {}   # 各語言 (類別, 風格) → 去重後的顯示名稱
+        self._recipe_ids    = recipes["RecipeID"].to_numpy() if "RecipeID" in recipes.columns else None
+        for lang, (cat_col, sub_col, name_col) in FACET_COLUMNS.items():
+            cats, subs = recipes[cat_col], recipes[sub_col]
+            self._categories[lang] = _sorted_values(cats)
+
+            self._subcategories[lang] = {ALL: _sorted_values(subs)}
+            positions = {(ALL, ALL): np.arange(len(recipes))}
+            for sub in self._subcategories[lang][ALL]:
+                positions[(ALL, sub)] = np.flatnonzero((subs == sub).to_numpy())
+            for cat in self._categories[lang]:
+                in_cat = (cats == cat).to_numpy()
+                positions[(cat, ALL)] = np.flatnonzero(in_cat)
+                self._subcategories[lang][cat] = _sorted_values(subs[in_cat])
+            by_pair = recipes.groupby([cat_col, sub_col], sort=False, observed=True).indices
+            positions.update({key: np.sort(pos) for key, pos in by_pair.items()})
+
+            names = recipes[name_col].to_numpy()
+            self._positions[lang]  = positions
+            self._names[lang]      = names
+            self._name_lists[lang] = {key: tuple(pd.unique(names[pos])) for key, pos in positions.items()}
+
+    def categories(self, lang):
+        """排序好的類別清單（不含 'All'）。"""
+        return self._categories[lang]
+
+    def subcategories(self, lang, category=ALL):
+        """該類別下排序好的風格清單；category 為 'All' 時回傳全部風格。"""
+        return self._subcategories[lang].get(category, [])
+
+    def names(self, lang):
+        """recipes 表每一列的顯示名稱（依列位置）。"""
+        return self._names[lang]
+
+    def positions(self, lang, category=ALL, subcategory=ALL):
+        """符合條件的食譜在 recipes 表中的列位置（遞增）。"""
+        return self._positions[lang].get((category, subcategory), np.empty(0, dtype=np.intp))
+
+    def recipe_ids(self, lang, category=ALL, subcategory=ALL):
+        return self._recipe_ids[self.positions(lang, category, subcategory)]
+
+    def recipe_names(self, lang, category=ALL, subcategory=ALL):
+        """符合條件的食譜顯示名稱（依列順序去重）。"""
+        return self._name_lists[lang].get((category, subcategory), ())
+
+    def recipe_names_at(self, lang, positions, category=ALL, subcategory=ALL):
+        """給定列位置（依給定順序，例如食材搜尋的排名）中符合類別 / 風格的顯示名稱，去重。"""
+        positions = np.asarray(positions, dtype=np.intp)
+        positions = positions[np.isin(positions, self.positions(lang, category, subcategory))]
+        return tuple(pd.unique(self._names[lang][positions]))
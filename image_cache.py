@@ -0,0 +1,245 @@
+"""遠端圖片的磁碟快取：內容定址、有容量上限、依最近使用時間（LRU）淘汰。
+
+blob 以內容的 sha256 命名存在 <root>/blobs/ 之下，URL → blob 的對應與存取時間
+記在同目錄的 SQLite（WAL 模式）裡，同一台主機上的所有 session 與 process 共用。
+imgur 相簿 / gallery 網址解析出的直連圖片網址也記在同一個資料庫。
+
+預先解析 workbook 內所有相簿網址：
+    python image_cache.py resolve-albums [workbook.xlsx ...] [--force]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+IMAGE_CACHE_DIR    = Path(__file__).parent / ".cache" / "images"
+DEFAULT_MAX_BYTES  = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+ALBUM_TTL          = 7 * 24 * 3600   # 解析成功的結果保留 7 天
+ALBUM_NEGATIVE_TTL = 3600            # 解析失敗 1 小時內不再重試
+ALBUM_TIMEOUT      = (3.05, 10)      # 抓相簿頁面的 (連線, 讀取) 逾時秒數，卡住的主機不會讓解析一直掛著
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest      TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    last_access REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs(last_access);
+CREATE TABLE IF NOT EXISTS urls (
+    url    TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_digest ON urls(digest);
+CREATE TABLE IF NOT EXISTS albums (
+    url        TEXT PRIMARY KEY,
+    resolved   TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def _open_index(root):
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(root / "index.sqlite3", timeout=10, isolation_level=None)
+
+
+class ImageCache:
+    def __init__(self, root=IMAGE_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root      = Path(root)
+        self.max_bytes = max_bytes
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # 每次操作開新連線：可跨 thread / process 使用，WAL 下讀寫互不阻擋
+        return _open_index(self.root)
+
+    def _blob_path(self, digest):
+        return self.root / "blobs" / digest[:2] / digest
+
+    def get(self, url):
+        """回傳快取中的圖片 bytes 並更新存取時間；未命中回傳 None。"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            digest = row[0]
+            try:
+                data = self._blob_path(digest).read_bytes()
+            except FileNotFoundError:
+                # blob 已被其他 process 淘汰
+                conn.execute("DELETE FROM urls WHERE url = ?", (url,))
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            return data
+
+    def put(self, url, data):
+        """寫入圖片並回傳其 sha256；超過容量上限時淘汰最久未使用的 blob。"""
+        digest = hashlib.sha256(data).hexdigest()
+        path   = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # prefetch 的 worker 可能同時寫入同一張圖，暫存檔名要含 thread id
+            tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO blobs(digest, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access",
+                (digest, len(data), time.time()))
+            conn.execute("INSERT OR REPLACE INTO urls(url, digest) VALUES (?, ?)", (url, digest))
+            conn.execute("COMMIT")
+        self.evict(keep=digest)
+        return digest
+
+    def fetch(self, url, download):
+        """read-through：先查磁碟快取，未命中才呼叫 download(url) 並寫回。"""
+        data = self.get(url)
+        if data is None:
+            data = download(url)
+            self.put(url, data)
+        return data
+
+    def total_bytes(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self, keep=None):
+        """依 last_access 由舊到新刪除 blob，直到總量不超過 max_bytes。"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            victims = []
+            if total > self.max_bytes:
+                for digest, size in conn.execute(
+                        "SELECT digest, size FROM blobs ORDER BY last_access"):
+                    if total <= self.max_bytes:
+                        break
+                    if digest == keep:
+                        continue
+                    victims.append(digest)
+                    total -= size
+                conn.executemany("DELETE FROM urls WHERE digest = ?", [(d,) for d in victims])
+                conn.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in victims])
+            conn.execute("COMMIT")
+        for digest in victims:
+            self._blob_path(digest).unlink(missing_ok=True)
+        return victims
+
+
+# ── imgur 相簿網址解析 ───────────────────────────────────────────────────────
+def is_album_url(url):
+    return "/a/" in url or "/gallery/" in url
+
+
+def parse_album_html(html):
+    """從相簿頁面取出 og:image（退而求其次用 image_src）；找不到回傳 None。"""
+    m = re.search(r'<meta property="og:image" content="([^"]+)"', html)
+    if m:
+        return m.group(1)
+    m = re.search(r'<link rel="image_src" href="([^"]+)"', html)
+    return m.group(1) if m else None
+
+
+_album_session      = None
+_album_session_lock = threading.Lock()
+
+
+def _default_session():
+    """相簿頁面共用的連線池 session（含重試），第一次用到時建立。"""
+    global _album_session
+    with _album_session_lock:
+        if _album_session is None:
+            from image_prefetch import make_session   # image_prefetch 會匯入本模組，延後匯入避免循環
+            _album_session = make_session(pool_size=1)
+        return _album_session
+
+
+def download_album_html(url, session=None, timeout=ALBUM_TIMEOUT):
+    response = (session or _default_session()).get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+
+class AlbumResolver:
+    """相簿網址 → 直連圖片網址的持久快取，成功與失敗的結果各有 TTL。"""
+
+    def __init__(self, root=IMAGE_CACHE_DIR, ttl=ALBUM_TTL, negative_ttl=ALBUM_NEGATIVE_TTL):
+        self.root         = Path(root)
+        self.ttl          = ttl
+        self.negative_ttl = negative_ttl
+        with closing(_open_index(self.root)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def lookup(self, url):
+        """回傳 (命中與否, 直連網址或 None)；過期的紀錄視為未命中。"""
+        with closing(_open_index(self.root)) as conn:
+            row = conn.execute(
+                "SELECT resolved, fetched_at FROM albums WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return False, None
+        resolved, fetched_at = row
+        ttl = self.ttl if resolved else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return False, None
+        return True, resolved
+
+    def store(self, url, resolved):
+        with closing(_open_index(self.root)) as conn:
+            conn.execute("INSERT OR REPLACE INTO albums(url, resolved, fetched_at) VALUES (?, ?, ?)",
+                         (url, resolved, time.time()))
+
+    def resolve(self, url, fetch_html=download_album_html, force=False):
+        """查快取，未命中（或 force）才抓頁面解析；失敗時記為 None 並回傳 None。"""
+        if not force:
+            hit, resolved = self.lookup(url)
+            if hit:
+                return resolved
+        try:
+            resolved = parse_album_html(fetch_html(url))
+        except (requests.RequestException, OSError):
+            resolved = None
+        self.store(url, resolved)
+        return resolved
+
+
+def resolve_workbook_albums(workbook, resolver, force=False):
+    """解析 workbook Recipes 工作表中所有相簿網址，回傳 {網址: 直連網址或 None}。"""
+    urls = pd.read_excel(workbook, sheet_name="Recipes")["ImageURL"].dropna()
+    albums = sorted({u for u in urls if isinstance(u, str) and u.startswith("http") and is_album_url(u)})
+    return {url: resolver.resolve(url, force=force) for url in albums}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recipe image cache maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    albums = sub.add_parser("resolve-albums", help="pre-resolve imgur album/gallery ImageURLs")
+    albums.add_argument("workbooks", nargs="*",
+                        default=[str(Path(__file__).parent / "Recipe_Database_Corrected.xlsx")])
+    albums.add_argument("--cache-dir", default=str(IMAGE_CACHE_DIR))
+    albums.add_argument("--force", action="store_true", help="ignore cached results and TTLs")
+    args = parser.parse_args(argv)
+
+    if args.command == "resolve-albums":
+        resolver = AlbumResolver(args.cache_dir)
+        for workbook in args.workbooks:
+            for url, resolved in resolve_workbook_albums(workbook, resolver, args.force).items():
+                print(f"{url} -> {resolved or 'UNRESOLVED'}")
+
+
+if __name__ == "__main__":
+    main()
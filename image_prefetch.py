@@ -0,0 +1,113 @@
+"""選取食譜圖片的並行預先下載：有上限的 thread pool + 共用連線池的 requests.Session。
+
+選取確定後立刻對所有遠端圖片（含相簿網址解析）同時送出下載，並在 worker 中產生顯示用的
+縮圖變體（見 image_variants.py）；渲染時還沒好的先顯示佔位，
+頁面其他內容畫完後再依完成順序補上。每個請求都有連線 / 讀取逾時，暫時性錯誤以退避重試，
+任何一台主機卡住都不會讓整個 session 停住。
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from image_cache import is_album_url
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Referer": "https://imgur.com/",
+}
+DEFAULT_TIMEOUT = (3.05, 10)   # (連線, 讀取) 秒
+MAX_WORKERS     = 8
+DISPLAY_WIDTH   = 500
+
+
+def make_session(pool_size=MAX_WORKERS, retries=3, backoff=0.5):
+    """連線池大小與 worker 數相同；連線錯誤與 429 / 5xx 以指數退避重試。
+
+    讀取逾時只重試一次，卡住的主機最多拖住一個 worker 兩倍讀取逾時。
+    """
+    retry = Retry(
+        total=retries, read=1, backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,   # 重試用完後交給 raise_for_status
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class FetchedImage(NamedTuple):
+    url:         str                # 原始 ImageURL
+    display_url: str                # 相簿網址解析後的直連網址（解析不到時同 url）
+    data:        Optional[bytes]    # 圖片內容；失敗時為 None
+    error:       Optional[str]  = None
+    path:        Optional[Path] = None   # 縮圖變體檔（有設定 variants 時）
+
+
+class ImagePrefetcher:
+    """把遠端圖片下載丟進背景 thread pool，經磁碟快取讀寫。
+
+    同一網址正在下載時重複要求會拿到同一個 Future；完成後就不再持有，
+    之後的要求直接命中磁碟快取。
+    """
+
+    def __init__(self, cache, resolver, session=None, max_workers=MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+                 variants=None, width=DISPLAY_WIDTH):
+        self.cache    = cache
+        self.resolver = resolver
+        self.variants = variants
+        self.width    = width
+        self.session  = session or make_session(max_workers)
+        self.timeout  = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-prefetch")
+        self._pending  = {}
+        self._lock     = threading.RLock()
+
+    def _get(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()   # 錯誤頁面不寫進快取
+        return response
+
+    def download(self, url):
+        return self._get(url).content
+
+    def download_html(self, url):
+        return self._get(url).text
+
+    def load(self, url):
+        """（在 worker thread 中）解析相簿網址、讀取圖片並產生變體；錯誤不拋出，記在 error。"""
+        display_url = url
+        try:
+            if is_album_url(url):
+                display_url = self.resolver.resolve(url, fetch_html=self.download_html) or url
+            data = self.cache.fetch(display_url, self.download)
+            path = self.variants.variant(data, self.width) if self.variants is not None else None
+            return FetchedImage(url, display_url, data, path=path)
+        except Exception as e:   # 下載失敗、不是圖片、解碼錯誤都交給畫面顯示
+            return FetchedImage(url, display_url, None, str(e))
+
+    def prefetch(self, urls):
+        """為每個網址送出（或沿用進行中的）下載工作，回傳 {網址: Future[FetchedImage]}。"""
+        futures = {}
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                future = self._pending.get(url)
+                if future is None:
+                    future = self._executor.submit(self.load, url)
+                    self._pending[url] = future
+                    future.add_done_callback(lambda f, url=url: self._forget(url, f))
+                futures[url] = future
+        return futures
+
+    def _forget(self, url, future):
+        with self._lock:
+            if self._pending.get(url) is future:
+                del self._pending[url]
@@ -0,0 +1,114 @@
+"""圖片縮圖變體：每張圖只在第一次用到時縮成固定寬度並重新壓縮，之後直接送檔案。
+
+變體以原圖內容的 sha256 命名：<root>/<digest[:2]>/<digest>/<寬度>.webp，
+同一張圖不論來自網址或本地檔、被多少 session 使用，都只解碼、縮圖一次；
+rerun 時不再經過 PIL，st.image 直接讀變體檔。Pillow 不支援 WebP 時改存 JPEG。
+
+預先產生變體（例如 header 與 images/ 下的本地圖片）：
+    python image_variants.py chef_tai_header_centered.png images/ --widths 500 1400
+"""
+import argparse
+import hashlib
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+VARIANT_DIR    = Path(__file__).parent / ".cache" / "variants"
+VARIANT_WIDTHS = (250, 500, 1000, 1400)
+MAX_ASPECT     = 1.4   # 高度上限 = 寬度 x 1.4（500 寬 → 700 高，與原本的版面相同）
+QUALITY        = 82
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+
+if features.check("webp"):
+    FORMAT, SUFFIX = "WEBP", ".webp"
+else:
+    FORMAT, SUFFIX = "JPEG", ".jpg"
+
+
+def pick_width(target):
+    """不小於 target 的最小固定寬度；超過最大寬度時用最大的。"""
+    return next((w for w in VARIANT_WIDTHS if w >= target), VARIANT_WIDTHS[-1])
+
+
+def fit_size(size, max_width, max_height):
+    """等比例縮進 max_width x max_height 的框內，不放大。"""
+    w, h = size
+    ratio = w / h
+    if w > max_width:
+        w, h = max_width, int(max_width / ratio)
+    if h > max_height:
+        h, w = max_height, int(max_height * ratio)
+    return max(w, 1), max(h, 1)
+
+
+def encode_variant(data, width):
+    """把原圖 bytes 縮成指定寬度的變體並回傳壓縮後的 bytes。"""
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    size  = fit_size(image.size, width, int(width * MAX_ASPECT))
+    if size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha and FORMAT == "WEBP" else "RGB")
+    out = BytesIO()
+    if FORMAT == "WEBP":
+        image.save(out, FORMAT, quality=QUALITY, method=6)
+    else:
+        image.save(out, FORMAT, quality=QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+class ImageVariants:
+    def __init__(self, root=VARIANT_DIR):
+        self.root = Path(root)
+        self._file_digests = {}   # (路徑, size, mtime_ns) → sha256，本地檔不必每次 rerun 重算
+
+    def _path(self, digest, width):
+        return self.root / digest[:2] / digest / f"{width}{SUFFIX}"
+
+    def _variant(self, digest, read, width):
+        width = pick_width(width)
+        path  = self._path(digest, width)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(encode_variant(read(), width))
+            os.replace(tmp, path)
+        return path
+
+    def variant(self, data, width):
+        """回傳圖片 bytes 在指定寬度的變體檔路徑（不存在時先產生）。"""
+        return self._variant(hashlib.sha256(data).hexdigest(), lambda: data, width)
+
+    def variant_of_file(self, path, width):
+        """同 variant()，來源為本地檔；檔案沒變動時不重新讀檔計算雜湊。"""
+        path = Path(path)
+        stat = path.stat()
+        key  = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        digest = self._file_digests.get(key)
+        if digest is None:
+            digest = self._file_digests[key] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return self._variant(digest, path.read_bytes, width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-build resized image variants")
+    parser.add_argument("paths", nargs="+", help="image files or directories")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(VARIANT_WIDTHS))
+    parser.add_argument("--cache-dir", default=str(VARIANT_DIR))
+    args = parser.parse_args(argv)
+
+    variants = ImageVariants(args.cache_dir)
+    for arg in args.paths:
+        arg   = Path(arg)
+        files = sorted(p for p in arg.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES) if arg.is_dir() else [arg]
+        for path in files:
+            for width in args.widths:
+                out = variants.variant_of_file(path, width)
+                print(f"{path} [{width}] {path.stat().st_size:>9,} -> {out.stat().st_size:>9,}  {out}")
+
+
+if __name__ == "__main__":
+    main()
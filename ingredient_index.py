@@ -0,0 +1,122 @@
+"""依食材搜尋食譜的倒排索引：食材 → 食譜 bitset，載入時一次建好。
+
+每個語言（English 依 Ingredient、中文依 Ingredient_zh）各有兩組 bitset：
+  • uses     ：用到該食材的食譜（含非必要）
+  • requires ：該食材為必要食材的食譜
+bitset 以 np.packbits 壓成 uint8，第 i 個 bit 對應 recipes 表第 i 列（與 facet 索引的列位置相同）。
+
+  • search()  ：AND / OR / NOT 條件，直接對 bitset 做 & | ~
+  • cookable()：手邊有的食材最多缺 k 樣必要食材就列出
+結果都是排序好的食譜列位置，每次輸入都重算也只要幾毫秒。
+"""
+import numpy as np
+import pandas as pd
+
+# 語言 → 食材欄位
+INGREDIENT_COLUMNS = {"中文": "Ingredient_zh", "English": "Ingredient"}
+
+
+class IngredientIndex:
+    def __init__(self, merged, recipes):
+        self.n_recipes = len(recipes)
+        self._nbytes   = (self.n_recipes + 7) // 8
+        self._all      = np.packbits(np.ones(self.n_recipes, dtype=bool))
+        position_of    = {rid: i for i, rid in enumerate(recipes["RecipeID"])}
+        rows = merged.dropna(subset=["RecipeID"])
+        positions = rows["RecipeID"].map(position_of).to_numpy(dtype=float)
+        optional  = rows["Optional"].fillna(False).to_numpy(dtype=bool)
+
+        self._names    = {}   # 語言 → 排序好的食材名稱
+        self._code_of  = {}   # 語言 → {名稱（含去空白 / 小寫別名）: 代碼}
+        self._uses     = {}
+        self._requires = {}
+        self._n_required = {}
+        for lang, col in INGREDIENT_COLUMNS.items():
+            names = rows[col].astype("string").str.strip().to_numpy(dtype=object)
+            valid = ~pd.isna(names) & ~np.isnan(positions)
+            codes, uniques = pd.factorize(names[valid], sort=True)
+            pos = positions[valid].astype(np.intp)
+            self._names[lang] = list(uniques)
+            code_of = {name.casefold(): i for i, name in enumerate(uniques)}
+            code_of.update({name: i for i, name in enumerate(uniques)})
+            self._code_of[lang]  = code_of
+            self._uses[lang]     = self._bitsets(codes, pos, len(uniques))
+            req = ~optional[valid]
+            self._requires[lang] = self._bitsets(codes[req], pos[req], len(uniques))
+            # 每道食譜的必要食材數（同一食材只算一次）
+            pairs = np.unique(codes[req].astype(np.int64) * max(self.n_recipes, 1) + pos[req])
+            self._n_required[lang] = np.bincount(pairs % max(self.n_recipes, 1), minlength=self.n_recipes)
+
+    def _bitsets(self, codes, positions, n_ingredients):
+        bits = np.zeros((n_ingredients, self._nbytes), dtype=np.uint8)
+        np.bitwise_or.at(bits, (codes, positions >> 3),
+                         (np.uint8(0x80) >> (positions & 7)).astype(np.uint8))
+        return bits
+
+    def ingredients(self, lang):
+        """排序好的食材名稱（給搜尋下拉選單用）。"""
+        return self._names[lang]
+
+    def _codes(self, lang, names):
+        code_of = self._code_of[lang]
+        codes = [code_of.get(n, code_of.get(str(n).strip().casefold())) for n in names]
+        return list(dict.fromkeys(c for c in codes if c is not None)), any(c is None for c in codes)
+
+    def _count(self, bitsets, codes):
+        """每道食譜在 codes 這些 bitset 中出現的次數。"""
+        if not codes:
+            return np.zeros(self.n_recipes, dtype=np.intp)
+        return np.unpackbits(bitsets[codes], axis=1, count=self.n_recipes).sum(axis=0, dtype=np.intp)
+
+    def search(self, lang, all_of=(), any_of=(), none_of=()):
+        """AND / OR / NOT 條件搜尋，回傳符合的食譜列位置。
+
+        依「用到幾樣指定的食材」由多到少排序，同分時維持 recipes 表順序。
+        """
+        uses = self._uses[lang]
+        all_codes, unknown = self._codes(lang, all_of)
+        if unknown:   # 必須包含的食材不在目錄中：沒有食譜符合
+            return np.empty(0, dtype=np.intp)
+        any_codes, _  = self._codes(lang, any_of)
+        none_codes, _ = self._codes(lang, none_of)
+
+        hits = self._all.copy()
+        for code in all_codes:
+            hits &= uses[code]
+        if any_of:
+            hits &= np.bitwise_or.reduce(uses[any_codes], axis=0) if any_codes else 0
+        for code in none_codes:
+            hits &= ~uses[code]
+        positions = np.flatnonzero(np.unpackbits(hits, count=self.n_recipes))
+
+        score = self._count(uses, all_codes + any_codes)[positions]
+        return positions[np.argsort(-score, kind="stable")]
+
+    def cookable(self, lang, have, max_missing=0):
+        """用手邊的食材能做的食譜：缺少的必要食材不超過 max_missing 樣。
+
+        回傳 (列位置, 缺少的必要食材數)，依缺少數由少到多、再依用到幾樣手邊食材由多到少排序。
+        """
+        codes, _ = self._codes(lang, have)
+        covered  = self._count(self._requires[lang], codes)
+        missing  = self._n_required[lang] - covered
+        positions = np.flatnonzero(missing <= max_missing)
+        used  = self._count(self._uses[lang], codes)[positions]
+        order = np.lexsort((-used, missing[positions]))
+        return positions[order], missing[positions][order]
+
+    def missing(self, lang, positions, have):
+        """多道食譜（列位置）各自還缺的必要食材名稱，依 positions 順序回傳 list of list。
+
+        have 只解析一次；取出這些食譜的 bitset 欄位，一次與「手邊沒有」的遮罩做 AND。
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        codes, _  = self._codes(lang, have)
+        lacking   = np.ones(len(self._names[lang]), dtype=bool)
+        lacking[codes] = False
+        bits     = (np.uint8(0x80) >> (positions & 7)).astype(np.uint8)
+        required = (self._requires[lang][:, positions >> 3] & bits) != 0
+        rows, cols = np.nonzero(required.T & lacking)   # 依食譜、再依食材代碼排序
+        names  = np.asarray(self._names[lang], dtype=object)
+        bounds = np.searchsorted(rows, np.arange(len(positions) + 1))
+        return [list(names[cols[lo:hi]]) for lo, hi in zip(bounds[:-1], bounds[1:])]
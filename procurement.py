@@ -0,0 +1,153 @@
+"""採購彙總引擎：把食材表整理成「食譜 × (食材, 單位, 非必要)」稀疏數量矩陣。
+
+矩陣只在載入時建立一次；任何選取組合的採購總量只需走訪被選到的列、乘上倍率再依欄位加總，
+不需要每次 rerun 都複製 DataFrame 再 groupby。
+"""
+import numpy as np
+import pandas as pd
+
+
+class QuantityMatrix:
+    """CSR 格式的食譜 × 食材數量矩陣。
+
+    列 = RecipeID（依首次出現順序），欄 = (ingredient_col, Unit, Optional)
+    依字典序排序，與原本 groupby 的輸出順序一致。同一食譜重複出現的食材會先加總。
+    """
+
+    def __init__(self, merged, ingredient_col="Ingredient"):
+        self.ingredient_col = ingredient_col
+        self.key_columns = [ingredient_col, "Unit", "Optional"]
+        rows = merged.dropna(subset=["RecipeID"] + self.key_columns)
+
+        grouped   = rows.groupby(self.key_columns, sort=True, observed=True)
+        col_codes = grouped.ngroup().to_numpy()
+        self.columns = grouped.size().index.to_frame(index=False)
+        row_codes, recipe_ids = pd.factorize(rows["RecipeID"])
+        self.recipe_ids = list(recipe_ids)
+        self._row_of = {rid: i for i, rid in enumerate(self.recipe_ids)}
+
+        n_rows, n_cols = len(self.recipe_ids), len(self.columns)
+        amounts = rows["Amount"].fillna(0).to_numpy(dtype=float)
+        flat, inverse = np.unique(row_codes.astype(np.int64) * n_cols + col_codes,
+                                  return_inverse=True)
+        self.data    = np.bincount(inverse, weights=amounts, minlength=len(flat))
+        self.indices = (flat % max(n_cols, 1)).astype(np.intp)
+        self.indptr  = np.searchsorted(flat // max(n_cols, 1), np.arange(n_rows + 1))
+        self.shape   = (n_rows, n_cols)
+
+    def totals(self, multipliers):
+        """回傳選取食譜的採購總量 DataFrame：key_columns + TotalAmount。
+
+        只走訪被選到的食譜所在的列，成本與選取食譜的食材數成正比。
+        """
+        cols, vals = [], []
+        for rid, mult in multipliers.items():
+            row = self._row_of.get(rid)
+            if row is None:
+                continue
+            start, stop = self.indptr[row], self.indptr[row + 1]
+            cols.append(self.indices[start:stop])
+            vals.append(self.data[start:stop] * mult)
+        summary = self.columns.iloc[:0].copy()
+        if not cols:
+            summary["TotalAmount"] = pd.Series(dtype=float)
+            return summary
+        cols = np.concatenate(cols)
+        touched = np.unique(cols)
+        totals  = np.bincount(cols, weights=np.concatenate(vals), minlength=self.shape[1])
+        summary = self.columns.iloc[touched].reset_index(drop=True)
+        summary["TotalAmount"] = totals[touched]
+        return summary
+
+    def stock_vector(self, stock):
+        """{(食材, 單位): 庫存量} → 每個欄位的庫存量（非必要欄位與必要欄位共用同一份庫存）。"""
+        keys = zip(self.columns[self.ingredient_col], self.columns["Unit"])
+        return np.array([float(stock.get(key, 0) or 0) for key in keys])
+
+    def max_batches(self, stock):
+        """庫存能做的最大倍率：每道食譜的必要食材「庫存 / 用量」取最小值。
+
+        整份目錄一次向量化計算，回傳 DataFrame：RecipeID、MaxBatch，以及限制倍率的食材
+        （ingredient_col、Unit）；沒有必要食材的食譜 MaxBatch 為 inf，限制食材為空。
+        """
+        available = self.stock_vector(stock)
+        rows      = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        required  = ~self.columns["Optional"].to_numpy(dtype=bool)
+        keep      = required[self.indices] & (self.data > 0)
+        rows, cols = rows[keep], self.indices[keep]
+        ratios    = available[cols] / self.data[keep]
+
+        # 依 (食譜, 比值) 排序，每道食譜的第一筆即最小比值與限制食材
+        order = np.lexsort((ratios, rows))
+        first = order[np.r_[True, rows[order][1:] != rows[order][:-1]]] if len(order) else order
+        max_batch = np.full(self.shape[0], np.inf)
+        limiting  = np.full(self.shape[0], -1)
+        max_batch[rows[first]] = ratios[first]
+        limiting[rows[first]]  = cols[first]
+
+        result = pd.DataFrame({"RecipeID": self.recipe_ids, "MaxBatch": max_batch})
+        limited = limiting >= 0
+        for col in (self.ingredient_col, "Unit"):
+            values = np.full(self.shape[0], None, dtype=object)
+            values[limited] = self.columns[col].to_numpy(dtype=object)[limiting[limited]]
+            result[col] = values
+        return result
+
+
+# ── 單一食譜 BoM ─────────────────────────────────────────────────────────────
+# 各語言的 (食材欄位, 顯示欄名：食材 / 數量 / 單位 / 非必要)
+BOM_COLUMNS = {
+    "中文":    ("Ingredient_zh", ["食材", "數量", "單位", "非必要"]),
+    "English": ("Ingredient",    ["Ingredient", "Quantity", "Unit", "Optional"]),
+}
+
+
+def format_quantities(values):
+    """format_quantity 的向量版：整數不帶小數點，其餘取一位小數。"""
+    values = np.asarray(values, dtype=float)
+    whole  = np.isfinite(values) & (values == np.floor(values))
+    ints   = np.where(whole, values, 0).astype(np.int64).astype(str)
+    return np.where(whole, ints, np.char.mod("%.1f", values))
+
+
+class BillOfMaterials:
+    """每道食譜各 component 的基礎 BoM（倍率 1），載入時一次 groupby 算好。
+
+    component 依 ComponentName 合併（同名的 component 顯示成一張表），順序為首次出現順序。
+    渲染時只剩一次純量乘法與向量化格式化。
+    """
+
+    def __init__(self, merged):
+        self._components = {}
+        first = merged.drop_duplicates(["RecipeID", "ComponentName"])
+        for rid, comp, comp_zh in zip(first["RecipeID"], first["ComponentName"], first["ComponentName_zh"]):
+            self._components.setdefault(rid, []).append((comp, {"中文": comp_zh, "English": comp}))
+
+        self._tables = {}
+        for lang, (ingredient_col, _) in BOM_COLUMNS.items():
+            grouped = (merged.groupby(["RecipeID", "ComponentName", ingredient_col, "Unit", "Optional"],
+                                      observed=True)["Amount"].sum().reset_index())
+            names    = grouped[ingredient_col].to_numpy()
+            amounts  = grouped["Amount"].to_numpy(dtype=float)
+            units    = grouped["Unit"].to_numpy()
+            optional = np.where(grouped["Optional"].to_numpy(dtype=bool), "✓", "")
+            by_component = grouped.groupby(["RecipeID", "ComponentName"], sort=False, observed=True)
+            for (rid, comp), pos in by_component.indices.items():
+                self._tables[(rid, comp, lang)] = (names[pos], amounts[pos], units[pos], optional[pos])
+
+    def components(self, recipe_id, lang):
+        """回傳 [(ComponentName, 顯示名稱)]，依首次出現順序。"""
+        return [(comp, labels[lang]) for comp, labels in self._components.get(recipe_id, [])]
+
+    def table(self, recipe_id, component_name, lang, mult=1.0):
+        """回傳乘上倍率、可直接顯示的 BoM 表。"""
+        labels = BOM_COLUMNS[lang][1]
+        empty  = np.empty(0, dtype=object)
+        names, amounts, units, optional = self._tables.get(
+            (recipe_id, component_name, lang), (empty, np.empty(0), empty, empty))
+        return pd.DataFrame({
+            labels[0]: names,
+            labels[1]: format_quantities(amounts * mult),
+            labels[2]: units,
+            labels[3]: optional,
+        })
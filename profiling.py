@@ -0,0 +1,100 @@
+"""輕量的分段計時：每次 rerun 各區段花多少時間，累積成百分位數。
+
+用法（在 Streamlit 腳本中）：
+    run = profiler.start_run(enabled)
+    ...資料載入...
+    run.lap("load")           # 自上一次 lap 起的時間記到 "load"
+    for recipe in selected:
+        ...圖片...
+        run.lap("image")      # 迴圈內同名區段會累加
+    run.finish()
+
+st.fragment 單獨重跑時不會經過腳本開頭的計時器，fragment 內自己開一個具名的計時器：
+    run = profiler.start_run(enabled, "recipe")
+    run.lap("image")          # 記到 "recipe.image"
+    run.finish()              # 整段記到 "recipe.total"
+
+未啟用時 start_run 回傳什麼都不做的計時器，開銷只有一次方法呼叫。
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+PROFILE_ENV = "RECIPE_PROFILE"
+
+
+def profiling_requested(query_params=None):
+    """環境變數 RECIPE_PROFILE=1 或網址參數 ?profile=1 時啟用。"""
+    if os.environ.get(PROFILE_ENV, "") not in ("", "0"):
+        return True
+    return bool(query_params) and query_params.get("profile", "0") not in ("", "0")
+
+
+class _NullRun:
+    def lap(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_RUN = _NullRun()
+
+
+class RunTimer:
+    def __init__(self, profiler, name=None):
+        self._profiler = profiler
+        self._prefix   = f"{name}." if name else ""
+        self._start    = self._last = time.perf_counter()
+        self.spans     = defaultdict(float)
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.spans[self._prefix + name] += now - self._last
+        self._last = now
+
+    def finish(self):
+        self.spans[self._prefix + "total"] = time.perf_counter() - self._start
+        self._profiler.record(self.spans)
+
+
+class Profiler:
+    """跨 rerun / session 累積各區段最近 history 次的耗時（秒）。"""
+
+    def __init__(self, history=500):
+        self._samples = defaultdict(lambda: deque(maxlen=history))
+        self._order   = []
+        self._lock    = threading.Lock()
+
+    def start_run(self, enabled, name=None):
+        """name 有給時（例如 fragment）各區段記成 "<name>.<區段>"，與整頁 rerun 分開統計。"""
+        return RunTimer(self, name) if enabled else _NULL_RUN
+
+    def record(self, spans):
+        with self._lock:
+            for name, seconds in spans.items():
+                if name not in self._samples:
+                    self._order.append(name)
+                self._samples[name].append(seconds)
+
+    def summary(self):
+        """各區段的次數與 p50 / p90 / p99 / max（毫秒），依第一次出現順序排列（各 total 放最後）。"""
+        with self._lock:
+            order   = sorted(self._order, key=lambda name: name.rsplit(".", 1)[-1] == "total")
+            samples = {name: np.array(self._samples[name]) for name in order}
+        rows = []
+        for name, values in samples.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1e3
+            rows.append({"section": name, "count": len(values), "p50_ms": round(p50, 2),
+                         "p90_ms": round(p90, 2), "p99_ms": round(p99, 2),
+                         "max_ms": round(values.max() * 1e3, 2)})
+        return rows
+
+    def to_json(self):
+        with self._lock:
+            raw = {name: list(self._samples[name]) for name in self._order}
+        return json.dumps({"summary": self.summary(), "samples_s": raw}, indent=2)
@@ -0,0 +1,104 @@
+"""驚喜挑選的抽樣器：直接從 facet 索引的 (類別, 風格) 食譜池抽，不必每道菜重新篩選整張表。
+
+  • 每道菜的條件與目前的篩選取交集後仍是一個 facet 池（每道食譜的類別 / 風格各只有一個值），查表即得
+  • 同一次挑選內不重複：抽到已選過的就重抽（一次最多挑 5 道，期望重抽次數為常數），
+    重抽太多次才退回掃描該池
+  • 可給 seed 重現同樣的結果；可給每道食譜的權重（例如熱門度、最近是否做過），
+    有權重的池第一次用到時以 alias method 建表，之後每次抽樣都是 O(1)
+"""
+import numpy as np
+
+from facets import ALL
+
+MAX_REJECTS = 32
+
+
+def combine(a, b):
+    """兩個篩選值取交集：'All' 不限；兩個不同的具體值交集為空，回傳 None。"""
+    if a == ALL:
+        return b
+    if b == ALL or a == b:
+        return a
+    return None
+
+
+def build_alias(weights):
+    """Vose alias method：回傳 (prob, alias)，抽樣時一次均勻抽位置、一次擲硬幣。"""
+    n      = len(weights)
+    scaled = np.asarray(weights, dtype=float) * n / np.sum(weights)
+    prob   = np.ones(n)
+    alias  = np.arange(n)
+    small  = [i for i in range(n) if scaled[i] < 1]
+    large  = [i for i in range(n) if scaled[i] >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1 - scaled[s]
+        (small if scaled[l] < 1 else large).append(l)
+    return prob, alias
+
+
+class SurpriseSampler:
+    def __init__(self, facets, weights=None):
+        """weights：與 recipes 表列位置對齊的非負權重；None 為均勻抽樣，權重 0 的食譜不會被抽到。"""
+        self.facets  = facets
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        self._tables = {}   # (語言, 類別, 風格) → (池, alias 表)
+
+    def _pool(self, lang, category, subcategory):
+        pool = self.facets.positions(lang, category, subcategory)
+        if self.weights is None:
+            return pool, None
+        key = (lang, category, subcategory)
+        if key not in self._tables:
+            pool = pool[self.weights[pool] > 0]
+            self._tables[key] = (pool, build_alias(self.weights[pool]) if len(pool) else None)
+        return self._tables[key]
+
+    def _restricted_pool(self, lang, category, subcategory, positions):
+        """facet 池再與 positions（例如食材搜尋的結果）取交集；有權重時為交集後的池另建 alias 表。"""
+        pool, table = self._pool(lang, category, subcategory)
+        if positions is None:
+            return pool, table
+        pool = pool[np.isin(pool, positions)]
+        return pool, (build_alias(self.weights[pool]) if self.weights is not None and len(pool) else None)
+
+    def _pick_one(self, rng, pool, table, names, used):
+        if len(pool) == 0:
+            return None
+        for _ in range(MAX_REJECTS):
+            i = rng.integers(len(pool))
+            if table is not None and rng.random() >= table[0][i]:
+                i = table[1][i]
+            if names[pool[i]] not in used:
+                return names[pool[i]]
+        # 池裡大多已被選過：退回掃描剩下的
+        rest = np.array([p for p in pool if names[p] not in used], dtype=np.intp)
+        if len(rest) == 0:
+            return None
+        if self.weights is None:
+            return names[rest[rng.integers(len(rest))]]
+        w = self.weights[rest]
+        return names[rng.choice(rest, p=w / w.sum())]
+
+    def pick(self, lang, filters, within=(ALL, ALL), seed=None, positions=None):
+        """每組 (類別, 風格) 各抽一道不重複的食譜，並限制在 within 這組篩選內。
+
+        positions 有給時（recipes 表列位置）只從其中抽，讓結果落在畫面上可選的食譜內。
+        回傳與 filters 等長的顯示名稱清單，抽不到的位置為 None。
+        """
+        rng   = np.random.default_rng(seed)
+        names = self.facets.names(lang)
+        used, picks = set(), []
+        for category, subcategory in filters:
+            key = (combine(category, within[0]), combine(subcategory, within[1]))
+            choice = None if None in key else self._pick_one(
+                rng, *self._restricted_pool(lang, *key, positions), names, used)
+            picks.append(choice)
+            if choice is not None:
+                used.add(choice)
+        return picks
+
+    def sample(self, lang, n, within=(ALL, ALL), seed=None, positions=None):
+        """從 within 篩選的池中抽 n 道不重複的食譜（池不夠時回傳全部能抽到的）。"""
+        return [p for p in self.pick(lang, [(ALL, ALL)] * n, within, seed, positions) if p is not None]
@@ -0,0 +1,182 @@
+"""生產排程：把 Steps 轉成相依 DAG，計算要徑與多道食譜同時製作的總工時。
+
+相依規則（每道食譜各自成立）：
+  • 非並行步驟需要廚師操作，依 StepOrder 串成一條鏈，每一步等前一個非並行步驟完成。
+  • 並行步驟（Parallel = True，例如冷藏、泡米、煮飯）在它之前最近一個非並行步驟
+    完成後開始，於背景進行，不佔用廚師。
+  • 背景步驟的產出由之後的部位（Part）取用：步驟依 StepOrder 切成連續同部位的段落，
+    背景步驟所在段落之後的下一段視為等待時順手做的另一個部位，不必等它；
+    再下一段開始（例如冷藏的派皮與內餡組合）的第一個非並行步驟要等它完成。
+  • 食譜的最後一步要等所有背景步驟完成。
+StepOrder 相同的步驟視為同時可開始。
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+class Schedule:
+    """排程結果。
+
+    steps    — 輸入的步驟加上 Start / End / Critical 欄位（依食譜、StepOrder 排序）
+    makespan — 所有選取食譜完成的總時間
+    """
+
+    def __init__(self, steps, makespan):
+        self.steps    = steps
+        self.makespan = makespan
+
+    def recipe_makespan(self, recipe_id):
+        ends = self.steps.loc[self.steps["RecipeID"] == recipe_id, "End"]
+        return ends.max() if not ends.empty else 0
+
+    def critical_path(self, recipe_id):
+        rows = self.steps[(self.steps["RecipeID"] == recipe_id) & self.steps["Critical"]]
+        return rows.reset_index(drop=True)
+
+
+def _prepare(steps):
+    frame = steps.reset_index(drop=True).copy()
+    frame["CycleTime"] = (pd.to_numeric(frame["CycleTime"], errors="coerce").fillna(0)
+                          if "CycleTime" in frame.columns else 0.0)
+    frame["Parallel"] = (frame["Parallel"].fillna(False).astype(bool)
+                         if "Parallel" in frame.columns else False)
+    frame["_part"]    = pd.factorize(frame["Part"])[0] if "Part" in frame.columns else 0
+    # 食譜維持輸入順序，食譜內依 StepOrder 排序（穩定排序保留同序步驟的原始順序）
+    frame["_recipe"] = pd.factorize(frame["RecipeID"])[0]
+    frame = frame.sort_values(["_recipe", "StepOrder"], kind="stable").reset_index(drop=True)
+    return frame
+
+
+def _dependencies(frame):
+    """回傳每個步驟的前置步驟列表；前置步驟的位置一定比自己小。"""
+    recipe = frame["_recipe"].to_numpy()
+    order  = frame["StepOrder"].to_numpy()
+    par    = frame["Parallel"].to_numpy()
+    part   = frame["_part"].to_numpy()
+    n      = len(frame)
+    deps   = [[] for _ in range(n)]
+    # 段落編號：食譜內部位每換一次加一
+    segment = np.zeros(n, dtype=np.intp)
+    if n:
+        changed = (part[1:] != part[:-1]) | (recipe[1:] != recipe[:-1])
+        segment[1:] = np.cumsum(changed)
+    start  = 0
+    while start < n:
+        stop = start
+        while stop < n and recipe[stop] == recipe[start]:
+            stop += 1
+        last_active, anchor, cur_order, background, pending = None, None, object(), [], []
+        for k in range(start, stop):
+            if order[k] != cur_order:
+                cur_order, anchor = order[k], last_active
+            if par[k]:
+                if anchor is not None:
+                    deps[k].append(anchor)
+                background.append(k)
+                pending.append(k)
+            else:
+                if last_active is not None:
+                    deps[k].append(last_active)
+                # 隔一個段落之後取用背景步驟的產出；之後的步驟經由非並行鏈間接等待
+                ready = [b for b in pending if segment[k] >= segment[b] + 2]
+                if ready:
+                    deps[k].extend(ready)
+                    pending = [b for b in pending if b not in ready]
+                last_active = k
+        final = stop - 1
+        if not par[final]:
+            deps[final].extend(background)
+        start = stop
+    return deps
+
+
+def _critical_flags(frame, deps, finish):
+    """每道食譜從最晚完成的步驟沿最晚完成的前置步驟回溯，標出要徑。"""
+    critical = np.zeros(len(frame), dtype=bool)
+    for _, idx in frame.groupby("_recipe", sort=False).indices.items():
+        k = idx[np.argmax(finish[idx])]
+        while k is not None:
+            critical[k] = True
+            k = max(deps[k], key=lambda d: finish[d]) if deps[k] else None
+    return critical
+
+
+def _list_schedule(frame, deps, duration, cooks):
+    """有限廚師數的清單排程：非並行步驟需要一位廚師，依剩餘最長路徑決定優先順序。"""
+    n    = len(frame)
+    par  = frame["Parallel"].to_numpy()
+    succ = [[] for _ in range(n)]
+    for k, ds in enumerate(deps):
+        for d in ds:
+            succ[d].append(k)
+    # bottom level：自己加上後續最長路徑
+    level = duration.copy()
+    for k in range(n - 1, -1, -1):
+        if succ[k]:
+            level[k] += max(level[s] for s in succ[k])
+
+    start, end = np.zeros(n), np.zeros(n)
+    indeg   = [len(ds) for ds in deps]
+    waiting = []   # (-level, k)：等廚師的非並行步驟
+    running = []   # (end, k)
+    free    = cooks
+    now     = 0.0
+
+    def release(k):
+        if par[k]:
+            start[k], end[k] = now, now + duration[k]
+            heapq.heappush(running, (end[k], k))
+        else:
+            heapq.heappush(waiting, (-level[k], k))
+
+    for k in range(n):
+        if indeg[k] == 0:
+            release(k)
+    while waiting or running:
+        while waiting and free > 0:
+            _, k = heapq.heappop(waiting)
+            start[k], end[k] = now, now + duration[k]
+            heapq.heappush(running, (end[k], k))
+            free -= 1
+        now, k = heapq.heappop(running)
+        if not par[k]:
+            free += 1
+        for s in succ[k]:
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                release(s)
+    return start, end
+
+
+def schedule(steps, cooks=None):
+    """排程一道或多道食譜的步驟。
+
+    cooks=None 表示每道食譜各有一位廚師（各自照要徑進行）；
+    給定整數時，所有食譜的非並行步驟共用這幾位廚師。
+    """
+    if steps.empty or "StepOrder" not in steps.columns:
+        empty = steps.iloc[:0].assign(Start=[], End=[], Critical=[])
+        return Schedule(empty, 0)
+    frame    = _prepare(steps)
+    deps     = _dependencies(frame)
+    duration = frame["CycleTime"].to_numpy(dtype=float)
+
+    # 要徑法：前置步驟位置都比較小，一次正向掃描即可
+    cp_start = np.zeros(len(frame))
+    for k, ds in enumerate(deps):
+        if ds:
+            cp_start[k] = max(cp_start[d] + duration[d] for d in ds)
+    cp_end = cp_start + duration
+
+    if cooks is None:
+        start, end = cp_start, cp_end
+    else:
+        start, end = _list_schedule(frame, deps, duration, max(int(cooks), 1))
+
+    frame["Start"]    = start
+    frame["End"]      = end
+    frame["Critical"] = _critical_flags(frame, deps, cp_end)
+    frame = frame.drop(columns=["_recipe", "_part"])
+    return Schedule(frame, float(end.max()) if len(end) else 0)
@@ -0,0 +1,39 @@
+"""📋 生產流程表格：把單一食譜的 Steps 列轉成顯示用的 HTML。
+
+同一部位（Part）連續出現時只在第一列顯示；說明中的換行與「; 」轉成 <br>。
+全部以欄為單位的向量運算完成，不逐列複製 Series。
+"""
+import numpy as np
+
+# 各語言的 (來源欄位 → 顯示欄名)
+SEQUENCE_COLUMNS = {
+    "中文": {"StepOrder": "步驟", "Part_zh": "部位", "Instruction_zh": "說明",
+             "CycleTime": "時間", "Parallel": "並行"},
+    "English": {"StepOrder": "Step", "Part": "Part", "Instruction_en": "Instruction",
+                "CycleTime": "CycleTime", "Parallel": "Parallel"},
+}
+
+
+def _line_breaks(instructions):
+    text = instructions.astype(str).str.replace("\n", "<br>", regex=False).str.replace("; ", "<br>", regex=False)
+    return text.where(instructions.notna(), instructions)
+
+
+def render_sequence_html(step_data, lang):
+    """回傳生產流程表格的 HTML；沒有步驟或缺少必要欄位時回傳 None。"""
+    columns  = SEQUENCE_COLUMNS[lang]
+    order, part_src, instruction_src = list(columns)[:3]
+    if step_data.empty or not all(c in step_data.columns for c in (order, part_src, instruction_src)):
+        return None
+    source = [order, part_src, instruction_src]
+    if "CycleTime" in step_data.columns and "Parallel" in step_data.columns:
+        source += ["CycleTime", "Parallel"]
+
+    table = step_data[source].astype(object).reset_index(drop=True)
+    table[instruction_src] = _line_breaks(step_data[instruction_src].reset_index(drop=True)).astype(object)
+    # 與上一列部位相同的留白（NaN 與任何值都視為不同，照樣顯示）
+    part = table[part_src]
+    table[part_src] = part.where(part.ne(part.shift()), "")
+    if "Parallel" in table.columns:
+        table["Parallel"] = np.where(table["Parallel"].astype(bool), "✓", "")
+    return table.rename(columns=columns).to_html(escape=False, index=False)
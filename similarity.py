@@ -0,0 +1,167 @@
+"""相似料理推薦：以食材比例向量的 cosine 相似度，載入時預先算好每道食譜的前 k 個鄰居。
+
+  • 向量：每道食譜一列，欄 = 食材（Ingredient）；值為該食材占同食譜同單位總量的比例
+    （數量先換成基準單位，見 units.py），再做 L2 正規化，cosine 就是內積
+  • 前 k 名：分批做矩陣乘法（一次 BLOCK 道食譜 × 全目錄），argpartition 取前 k
+  • 增量重算：鄰居表連同每道食譜食材列的指紋存到磁碟；下次載入只重算指紋有變的食譜，
+    其餘食譜把「變動食譜的新分數」併進原本的鄰居表即可；只有原本的鄰居被刪除或分數變低時，
+    才需要整列重算（否則第 k+1 名可能是沒記錄到的食譜）
+渲染時查表為 O(k)。
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+SIMILAR_K = 10     # 每道食譜存的鄰居數
+BLOCK     = 1024   # 每批計算的食譜數
+
+
+def ingredient_vectors(frame):
+    """回傳 (RecipeID 清單, L2 正規化的比例矩陣 float32, 每道食譜食材列的指紋 uint64)。"""
+    rows = frame.dropna(subset=["RecipeID", "Ingredient"])
+    row_codes, recipe_ids = pd.factorize(rows["RecipeID"])
+    col_codes, _          = pd.factorize(rows["Ingredient"])
+    amounts = rows["Amount"].fillna(0).to_numpy(dtype=float)
+    units   = rows["Unit"].astype("string").fillna("")
+
+    # 同食譜同單位內的比例；沒有數量的食材以 1 計
+    amounts = np.where(amounts > 0, amounts, 1.0)
+    totals  = pd.Series(amounts).groupby([row_codes, units.to_numpy()]).transform("sum").to_numpy()
+    shares  = amounts / totals
+
+    vectors = np.zeros((len(recipe_ids), col_codes.max() + 1 if len(col_codes) else 0), dtype=np.float32)
+    np.add.at(vectors, (row_codes, col_codes), shares)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+
+    # 列雜湊依食譜加總（與列順序無關），任一食材列變動指紋就會改變
+    hashed = pd.util.hash_pandas_object(
+        rows[["RecipeID", "Ingredient", "Amount", "Unit", "Optional"]].astype("string"), index=False)
+    fingerprints = np.zeros(len(recipe_ids), dtype=np.uint64)
+    np.add.at(fingerprints, row_codes, hashed.to_numpy(dtype=np.uint64))
+    return list(recipe_ids), vectors, fingerprints
+
+
+def top_k(vectors, rows, k):
+    """rows 這些食譜的前 k 個鄰居：(列位置 len(rows) × k，分數)；不足或分數為 0 的位置為 -1。"""
+    rows = np.asarray(rows, dtype=np.intp)
+    n    = len(vectors)
+    k_eff = min(k, n - 1)
+    neighbors = np.full((len(rows), k), -1, dtype=np.intp)
+    scores    = np.zeros((len(rows), k), dtype=np.float32)
+    if k_eff <= 0:
+        return neighbors, scores
+    for start in range(0, len(rows), BLOCK):
+        block = rows[start:start + BLOCK]
+        sims  = vectors[block] @ vectors.T
+        sims[np.arange(len(block)), block] = -np.inf   # 排除自己
+        idx   = np.argpartition(-sims, k_eff - 1, axis=1)[:, :k_eff]
+        val   = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-val, axis=1, kind="stable")
+        idx, val = np.take_along_axis(idx, order, axis=1), np.take_along_axis(val, order, axis=1)
+        neighbors[start:start + len(block), :k_eff] = np.where(val > 0, idx, -1)
+        scores[start:start + len(block), :k_eff]    = np.where(val > 0, val, 0)
+    return neighbors, scores
+
+
+class SimilarityIndex:
+    """RecipeID → 前 k 個相似食譜。path 有給時讀寫磁碟上的鄰居表，只重算有變動的食譜。"""
+
+    def __init__(self, frame, k=SIMILAR_K, path=None):
+        self.k = k
+        self.recipe_ids, vectors, fingerprints = ingredient_vectors(frame)
+        self._row_of = {rid: i for i, rid in enumerate(self.recipe_ids)}
+        previous = self._read(path)
+        if previous is None:
+            self.neighbors, self.scores = top_k(vectors, np.arange(len(self.recipe_ids)), k)
+            self.recomputed = len(self.recipe_ids)
+        else:
+            self.neighbors, self.scores = self._update(vectors, fingerprints, *previous)
+        if path is not None and self.recomputed:
+            self._write(path, fingerprints)
+
+    def similar(self, recipe_id, k=5):
+        """[(RecipeID, 相似度)]，由高到低，最多 k 筆。"""
+        row = self._row_of.get(recipe_id)
+        if row is None:
+            return []
+        return [(self.recipe_ids[n], float(s))
+                for n, s in zip(self.neighbors[row, :k], self.scores[row, :k]) if n >= 0]
+
+    # ── 增量重算 ──
+    def _update(self, vectors, fingerprints, old_ids, old_fps, old_neighbors, old_scores):
+        n, k = len(self.recipe_ids), self.k
+        old_fp_of = dict(zip(old_ids, old_fps))
+        changed   = np.array([old_fp_of.get(rid) != fp for rid, fp in zip(self.recipe_ids, fingerprints)],
+                             dtype=bool)
+        removed   = len(set(old_ids) - set(self.recipe_ids))
+        changed_rows = np.flatnonzero(changed)
+        if len(changed_rows) > BLOCK:   # 變動太多時整份重算比較省
+            self.recomputed = n
+            return top_k(vectors, np.arange(n), k)
+
+        # 舊鄰居表換成新的列位置與列順序（鄰居已刪除為 -2；新食譜整列為 -1）
+        old_row_of = {rid: i for i, rid in enumerate(old_ids)}
+        old_rows   = np.array([old_row_of.get(rid, -1) for rid in self.recipe_ids], dtype=np.intp)
+        has_old    = (old_rows >= 0)[:, None]
+        mapping    = np.array([self._row_of.get(rid, -2) for rid in old_ids] + [-1], dtype=np.intp)
+        neighbors  = np.where(has_old, mapping[old_neighbors[np.maximum(old_rows, 0)]], -1)
+        scores     = np.where(has_old, old_scores[np.maximum(old_rows, 0)], 0).astype(np.float32)
+        self.recomputed = len(changed_rows) + removed
+        if not self.recomputed:
+            return neighbors, scores
+
+        # 原本的鄰居被刪除，或變動後分數變低：該列需整列重算
+        dirty = (neighbors == -2) | ((neighbors >= 0) & changed[np.maximum(neighbors, 0)])
+        full  = changed | (neighbors == -2).any(axis=1)
+        if len(changed_rows):
+            sims = vectors[changed_rows] @ vectors.T   # 變動食譜 × 全目錄
+            sims[np.arange(len(changed_rows)), changed_rows] = -np.inf
+            col_of_changed = np.full(n, 0, dtype=np.intp)
+            col_of_changed[changed_rows] = np.arange(len(changed_rows))
+            current = sims[col_of_changed[np.maximum(neighbors, 0)], np.arange(n)[:, None]]
+            full   |= (dirty & (neighbors >= 0) & (current < scores)).any(axis=1)
+
+            # 其餘列：沒變動的舊鄰居 + 所有變動食譜的新分數，取前 k
+            merge = np.flatnonzero(~full)
+            if len(merge):
+                cand_idx = np.concatenate([neighbors[merge],
+                                           np.broadcast_to(changed_rows, (len(merge), len(changed_rows)))], axis=1)
+                cand_val = np.concatenate([np.where(dirty[merge] | (neighbors[merge] < 0), -np.inf, scores[merge]),
+                                           sims[:, merge].T], axis=1)
+                order = np.argsort(-cand_val, axis=1, kind="stable")[:, :k]
+                val   = np.take_along_axis(cand_val, order, axis=1)
+                idx   = np.take_along_axis(cand_idx, order, axis=1)
+                neighbors[merge] = np.where(val > 0, idx, -1)
+                scores[merge]    = np.where(val > 0, val, 0)
+
+        rows = np.flatnonzero(full)
+        neighbors[rows], scores[rows] = top_k(vectors, rows, k)
+        self.recomputed = len(rows) + removed
+        return neighbors, scores
+
+    # ── 磁碟 ──
+    def _read(self, path):
+        if path is None:
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["k"]) != self.k:
+                    return None
+                return (list(data["recipe_ids"]), data["fingerprints"],
+                        data["neighbors"], data["scores"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _write(self, path, fingerprints):
+        path = os.fspath(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        try:
+            np.savez(tmp, k=self.k, recipe_ids=np.array(self.recipe_ids, dtype=str),
+                     fingerprints=fingerprints, neighbors=self.neighbors, scores=self.scores)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
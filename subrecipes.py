@@ -0,0 +1,125 @@
+"""子食譜展開：Ingredients 表的食材欄可以填另一個 ComponentID 或 RecipeID，引用整份半成品。
+
+例如 Lemon Bar 與 Cheery Pie 共用同一份塔皮：Cheery Pie 的餅皮 component 只要一列
+Ingredient = C001、Amount = 1（份數，Unit 不使用），載入時就展開成 C001 的原料。
+引用可以多層，整份目錄視為一張 DAG：
+
+  • 每個節點（component / 食譜）只展開一次並記住結果（原料列位置 × 倍數），
+    之後被多少個上層引用都直接縮放；成本與不同節點數成正比，而不是展開路徑數
+  • 走訪中遇到仍在堆疊上的節點即為循環引用，以 ValueError 回報整條路徑
+  • 同一原料經由不同路徑到達時先合併成一列；非必要標記沿路徑取「或」
+
+展開後的列沿用上層那一列的 RecipeID / ComponentID，下游的合併、採購矩陣與 BoM 都不需要知道有引用。
+"""
+import numpy as np
+import pandas as pd
+
+
+def _groups(frame, column):
+    if column not in frame.columns:
+        return {}
+    return frame.groupby(column, sort=False, observed=True).indices
+
+
+class SubRecipeGraph:
+    """Ingredients 表的引用圖；expand(節點) 回傳該節點展開到原料的 (列位置, 倍數, 非必要)。"""
+
+    def __init__(self, ingredients, components=None):
+        self._by_component = _groups(ingredients, "ComponentID")
+        self._by_recipe    = _groups(ingredients, "RecipeID")
+        node_ids = set(self._by_component) | set(self._by_recipe)
+        if components is not None:
+            node_ids |= set(components["ComponentID"].dropna())
+
+        names = ingredients["Ingredient"].astype("string").str.strip()
+        self.is_reference = names.isin(node_ids).fillna(False).to_numpy(dtype=bool)
+        self.targets  = names.to_numpy(dtype=object)
+        self.amounts  = ingredients["Amount"].astype(float).fillna(1.0).to_numpy()
+        self.optional = ingredients["Optional"].fillna(False).astype(bool).to_numpy()
+        self._memo    = {}
+
+    def _rows(self, node):
+        rows = self._by_component.get(node)
+        return rows if rows is not None else self._by_recipe.get(node, np.empty(0, dtype=np.intp))
+
+    def expand(self, node):
+        """節點展開後的 (原料列位置, 倍數, 非必要)；以堆疊走訪，深層引用也不會碰到遞迴上限。"""
+        if node in self._memo:
+            return self._memo[node]
+        stack, path, on_path = [(node, False)], [], set()
+        while stack:
+            current, children_done = stack.pop()
+            if children_done:
+                self._memo[current] = self._combine(current)
+                on_path.discard(path.pop())
+                continue
+            if current in self._memo:
+                continue
+            if current in on_path:
+                cycle = path[path.index(current):] + [current]
+                raise ValueError(f"circular sub-recipe reference: {' -> '.join(map(str, cycle))}")
+            path.append(current)
+            on_path.add(current)
+            stack.append((current, True))
+            rows = self._rows(current)
+            for target in self.targets[rows[self.is_reference[rows]]][::-1]:
+                if target not in self._memo:
+                    stack.append((target, False))
+        return self._memo[node]
+
+    def _combine(self, node):
+        positions, factors, optional = [], [], []
+        for row in self._rows(node):
+            if self.is_reference[row]:
+                pos, fac, opt = self._memo[self.targets[row]]
+                positions.append(pos)
+                factors.append(fac * self.amounts[row])
+                optional.append(opt | self.optional[row])
+            else:
+                positions.append([row])
+                factors.append([1.0])
+                optional.append([self.optional[row]])
+        if not positions:
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=bool)
+        positions = np.concatenate(positions).astype(np.intp)
+        factors   = np.concatenate(factors).astype(float)
+        optional  = np.concatenate(optional).astype(bool)
+        # 同一原料（且非必要標記相同）經不同路徑到達時合併，依首次出現順序
+        keys = positions * 2 + optional
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        summed = np.bincount(inverse, weights=factors, minlength=len(uniq))
+        order  = np.argsort(first, kind="stable")
+        return uniq[order] // 2, summed[order], (uniq[order] % 2).astype(bool)
+
+
+def explode_subrecipes(ingredients, components=None):
+    """把 Ingredients 表中引用 component / 食譜的列換成展開後的原料列；沒有引用時原表照回。"""
+    graph = SubRecipeGraph(ingredients, components)
+    if not graph.is_reference.any():
+        return ingredients
+
+    source, parent, factor, optional = [], [], [], []
+    for row in range(len(ingredients)):
+        if graph.is_reference[row]:
+            pos, fac, opt = graph.expand(graph.targets[row])
+            source.append(pos)
+            parent.append(np.full(len(pos), row))
+            factor.append(fac * graph.amounts[row])
+            optional.append(opt | graph.optional[row])
+        else:
+            source.append([row])
+            parent.append([row])
+            factor.append([1.0])
+            optional.append([graph.optional[row]])
+    source   = np.concatenate(source).astype(np.intp)
+    parent   = np.concatenate(parent).astype(np.intp)
+    expanded = graph.is_reference[parent]
+
+    out = ingredients.iloc[source].reset_index(drop=True)
+    for col in ("RecipeID", "ComponentID"):
+        out[col] = ingredients[col].to_numpy()[parent]
+    out["Amount"]   = np.where(expanded, out["Amount"].astype(float) * np.concatenate(factor),
+                               out["Amount"].astype(float))
+    out["Optional"] = pd.Series(np.concatenate(optional), dtype=bool).where(
+        expanded, ingredients["Optional"].iloc[source].reset_index(drop=True))
+    return out
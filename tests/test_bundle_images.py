@@ -0,0 +1,100 @@
+"""bundle_images 對本地 HTTP 伺服器的端對端測試：一張圖片、一個相簿頁面、一個 404。"""
+import hashlib
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+import openpyxl
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bundle_images import bundle_workbook                      # noqa: E402
+from image_cache import AlbumResolver, ImageCache              # noqa: E402
+from image_prefetch import ImagePrefetcher, make_session       # noqa: E402
+from image_variants import SUFFIX                              # noqa: E402
+
+
+def _png(color, size=(64, 48)):
+    out = BytesIO()
+    Image.new("RGB", size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    """在 tmp_path/www 提供靜態檔案的本地伺服器，回傳 base URL。"""
+    www = tmp_path / "www"
+    www.mkdir()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(www)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield www, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _workbook(path, urls):
+    book  = openpyxl.Workbook()
+    sheet = book.active
+    sheet.title = "Recipes"
+    sheet.append(["RecipeID", "ImageURL"])
+    for i, url in enumerate(urls, 1):
+        sheet.append([f"R{i:03d}", url])
+    book.save(path)
+
+
+def _image_urls(path):
+    sheet = openpyxl.load_workbook(path)["Recipes"]
+    return [row[1] for row in sheet.iter_rows(min_row=2, values_only=True)]
+
+
+def test_bundle_workbook(tmp_path, server):
+    www, base = server
+    photo, cover = _png("red"), _png("blue")
+    (www / "photo.png").write_bytes(photo)
+    (www / "cover.png").write_bytes(cover)
+    (www / "a").mkdir()
+    (www / "a" / "album1").write_text(
+        f'<html><head><meta property="og:image" content="{base}/cover.png"></head></html>')
+
+    image_url, album_url, missing_url = f"{base}/photo.png", f"{base}/a/album1", f"{base}/missing.png"
+    source = tmp_path / "source.xlsx"
+    _workbook(source, [image_url, album_url, missing_url, "images/already_local.webp", None, image_url])
+
+    cache_dir  = tmp_path / "cache"
+    prefetcher = ImagePrefetcher(ImageCache(cache_dir), AlbumResolver(cache_dir),
+                                 make_session(2, retries=0), max_workers=2)
+    output = tmp_path / "out" / "bundled.xlsx"
+    local, failed = bundle_workbook(source, output, prefetcher=prefetcher)
+
+    # 內容雜湊命名的檔案存在 images/，同一張圖只存一份
+    expected = {
+        image_url: f"images/{hashlib.sha256(photo).hexdigest()[:16]}{SUFFIX}",
+        album_url: f"images/{hashlib.sha256(cover).hexdigest()[:16]}{SUFFIX}",
+    }
+    assert local == expected
+    stored = sorted(p.relative_to(output.parent).as_posix() for p in (output.parent / "images").iterdir())
+    assert stored == sorted(expected.values())
+    for rel in expected.values():
+        with Image.open(output.parent / rel) as image:
+            assert image.size == (64, 48)
+
+    # 下載失敗的網址記在 failed，workbook 中保留原值
+    assert list(failed) == [missing_url]
+    assert "404" in failed[missing_url]
+
+    assert _image_urls(output) == [
+        expected[image_url], expected[album_url], missing_url, "images/already_local.webp", None,
+        expected[image_url],
+    ]
+    assert _image_urls(source)[0] == image_url   # 來源 workbook 不被修改
@@ -0,0 +1,48 @@
+"""scheduler 的相依規則：背景步驟要擋住之後取用其部位產出的步驟。"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog import parse_workbook   # noqa: E402
+from scheduler import schedule       # noqa: E402
+
+
+def _steps(rows):
+    return pd.DataFrame(rows, columns=["RecipeID", "StepOrder", "Part", "Parallel", "CycleTime"])
+
+
+def test_r004_chilled_dough_waits_for_fridge():
+    # R004：派皮冷藏 60 分鐘（步驟 3）時先備內餡（步驟 4、5），取出派皮（步驟 6）要等冷藏結束
+    _, _, steps, _ = parse_workbook()
+    plan = schedule(steps[steps["RecipeID"] == "R004"])
+    start = dict(zip(plan.steps["StepOrder"], plan.steps["Start"]))
+    assert start == {1: 0, 2: 1, 3: 4, 4: 4, 5: 9, 6: 64, 7: 67, 8: 72, 9: 74}
+    assert plan.makespan == 99
+    assert list(plan.critical_path("R004")["StepOrder"]) == [1, 2, 3, 6, 7, 8, 9]
+
+
+def test_background_gates_second_part_boundary():
+    plan = schedule(_steps([
+        ("X", 1, "A", False, 2),
+        ("X", 2, "A", True,  30),   # 背景
+        ("X", 3, "B", False, 5),    # 等待時做的另一個部位：不必等
+        ("X", 4, "A", False, 1),    # 回到 A：要等背景完成
+        ("X", 5, "C", False, 4),
+    ]))
+    start = dict(zip(plan.steps["StepOrder"], plan.steps["Start"]))
+    assert start == {1: 0, 2: 2, 3: 2, 4: 32, 5: 33}
+    assert plan.makespan == 37
+
+
+def test_background_within_last_part_only_gates_final_step():
+    plan = schedule(_steps([
+        ("Y", 1, "Main", True,  50),   # 背景（例如煮飯）
+        ("Y", 2, "Main", False, 10),
+        ("Y", 3, "Main", False, 1),
+    ]))
+    start = dict(zip(plan.steps["StepOrder"], plan.steps["Start"]))
+    assert start == {1: 0, 2: 0, 3: 50}
+    assert plan.makespan == 51
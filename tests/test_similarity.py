@@ -0,0 +1,61 @@
+"""相似料理鄰居表的增量重算：修改、新增、刪除食譜後要與整份重算的結果相同。"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from similarity import SimilarityIndex, ingredient_vectors   # noqa: E402
+
+UNITS = ["g", "ml", "ea"]
+
+
+def _recipe(rng, rid, n_ingredients=40):
+    picks = rng.choice(n_ingredients, size=rng.integers(2, 8), replace=False)
+    return [(rid, f"I{i:02d}", float(rng.integers(1, 50)), UNITS[i % 3], bool(rng.random() < 0.1))
+            for i in picks]
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["RecipeID", "Ingredient", "Amount", "Unit", "Optional"])
+
+
+def _assert_same(incremental, full, frame):
+    assert incremental.recipe_ids == full.recipe_ids
+    np.testing.assert_allclose(incremental.scores, full.scores, rtol=1e-5, atol=1e-6)
+    assert ((incremental.neighbors >= 0) == (full.neighbors >= 0)).all()
+    # 分數並列時兩邊可能選到不同的鄰居，改為確認每個鄰居的實際相似度就是記錄的分數
+    _, vectors, _ = ingredient_vectors(frame)
+    rows, cols = np.nonzero(incremental.neighbors >= 0)
+    actual = np.einsum("ij,ij->i", vectors[rows], vectors[incremental.neighbors[rows, cols]])
+    np.testing.assert_allclose(actual, incremental.scores[rows, cols], rtol=1e-5, atol=1e-6)
+    assert (incremental.neighbors[rows, cols] != rows).all()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_incremental_matches_full_rebuild(tmp_path, seed):
+    rng     = np.random.default_rng(seed)
+    path    = tmp_path / "similarity.npz"
+    recipes = {f"R{i:04d}": _recipe(rng, f"R{i:04d}") for i in range(300)}
+    SimilarityIndex(_frame([r for rows in recipes.values() for r in rows]), k=5, path=path)
+
+    ids = list(recipes)
+    for rid in rng.choice(ids, size=15, replace=False):            # 修改
+        recipes[rid] = _recipe(rng, rid)
+    for rid in rng.choice(ids, size=10, replace=False):            # 刪除
+        recipes.pop(rid, None)
+    for i in range(300, 310):                                       # 新增
+        recipes[f"R{i:04d}"] = _recipe(rng, f"R{i:04d}")
+    frame = _frame([r for rows in recipes.values() for r in rows])
+
+    incremental = SimilarityIndex(frame, k=5, path=path)
+    assert 0 < incremental.recomputed < len(recipes)
+    _assert_same(incremental, SimilarityIndex(frame, k=5), frame)
+
+    # 沒有變動時不重算，讀回的鄰居表不變
+    unchanged = SimilarityIndex(frame, k=5, path=path)
+    assert unchanged.recomputed == 0
+    _assert_same(unchanged, incremental, frame)
@@ -0,0 +1,84 @@
+"""子食譜展開：多層縮放、菱形引用合併、非必要標記、循環引用。"""
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from subrecipes import SubRecipeGraph, explode_subrecipes   # noqa: E402
+
+
+def _ingredients(rows):
+    return pd.DataFrame(rows, columns=["RecipeID", "ComponentID", "Ingredient", "Amount", "Unit", "Optional"])
+
+
+def _rows_of(frame, component_id):
+    rows = frame[frame["ComponentID"] == component_id]
+    return {(r.Ingredient, r.Unit): (r.Amount, r.Optional) for r in rows.itertuples()}
+
+
+def test_nested_component_component_recipe():
+    frame = _ingredients([
+        ("R001", "C001", "Flour", 100.0, "g",  False),
+        ("R001", "C001", "Egg",     1.0, "ea", False),
+        ("R002", "C002", "R001",    3.0, None, False),   # 引用整道食譜 3 份
+        ("R003", "C003", "C002",    2.0, None, False),   # 引用 component 2 份
+        ("R003", "C003", "Salt",    5.0, "g",  False),
+    ])
+    out = explode_subrecipes(frame)
+    assert _rows_of(out, "C003") == {("Flour", "g"): (600.0, False), ("Egg", "ea"): (6.0, False),
+                                     ("Salt", "g"): (5.0, False)}
+    assert set(out.loc[out["ComponentID"] == "C003", "RecipeID"]) == {"R003"}
+    assert _rows_of(out, "C001") == {("Flour", "g"): (100.0, False), ("Egg", "ea"): (1.0, False)}
+    assert "C002" not in set(out["Ingredient"]) and "R001" not in set(out["Ingredient"])
+
+
+def test_diamond_reached_by_two_paths():
+    frame = _ingredients([
+        ("R001", "C001", "Sugar", 10.0, "g",  False),   # 共用的底層
+        ("R001", "C002", "C001",   1.0, None, False),
+        ("R001", "C003", "C001",   3.0, None, False),
+        ("R002", "C004", "C002",   1.0, None, False),
+        ("R002", "C004", "C003",   2.0, None, False),
+    ])
+    graph = SubRecipeGraph(frame)
+    positions, factors, optional = graph.expand("C004")
+    assert list(positions) == [0] and list(factors) == [7.0] and not optional.any()
+    # 在節點內經兩條路徑到達的同一原料合併成一列（1×1 + 3×2）；C004 的兩列引用各自展開
+    rows = explode_subrecipes(frame).query("ComponentID == 'C004'")
+    assert list(zip(rows["Ingredient"], rows["Amount"])) == [("Sugar", 10.0), ("Sugar", 60.0)]
+    parent = _ingredients([("R003", "C005", "C004", 1.0, None, False)])
+    rows = explode_subrecipes(pd.concat([frame, parent], ignore_index=True)).query("ComponentID == 'C005'")
+    assert list(zip(rows["Ingredient"], rows["Amount"])) == [("Sugar", 70.0)]
+
+
+def test_optional_is_ored_along_path():
+    frame = _ingredients([
+        ("R001", "C001", "Butter",  20.0, "g", False),
+        ("R001", "C001", "Mint",     1.0, "g", True),
+        ("R001", "C002", "C001",     1.0, None, True),    # 整份非必要：底下全部變非必要
+        ("R002", "C003", "C001",     2.0, None, False),   # 必要引用：保留原本標記
+        ("R002", "C003", "C002",     1.0, None, False),
+    ])
+    out = explode_subrecipes(frame)
+    assert _rows_of(out, "C002") == {("Butter", "g"): (20.0, True), ("Mint", "g"): (1.0, True)}
+    rows = out[out["ComponentID"] == "C003"]
+    assert sorted(zip(rows["Ingredient"], rows["Amount"], rows["Optional"])) == [
+        ("Butter", 20.0, True), ("Butter", 40.0, False), ("Mint", 1.0, True), ("Mint", 2.0, True),
+    ]
+
+
+def test_cycle_reports_full_path():
+    frame = _ingredients([
+        ("R001", "C001", "C002",  1.0, None, False),
+        ("R001", "C002", "C003",  1.0, None, False),
+        ("R001", "C003", "C001",  1.0, None, False),
+        ("R001", "C003", "Water", 1.0, "ml", False),
+    ])
+    with pytest.raises(ValueError, match=re.escape("C001 -> C002 -> C003 -> C001")):
+        SubRecipeGraph(frame).expand("C001")
+    with pytest.raises(ValueError, match="circular sub-recipe reference"):
+        explode_subrecipes(frame)
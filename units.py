@@ -0,0 +1,65 @@
+"""單位換算：把食材數量換成統一的基準單位，讓採購清單同一食材只有一行。
+
+單位表定義每個單位的量綱（重量 / 容量 / 個數）與換成基準單位（g / ml / ea）的倍數；
+IngredientDict 可選填兩個換算欄位：
+  • Density     ：密度（g/ml），容量可換成重量
+  • EachWeight  ：每個的重量（g/ea），個數可換成重量
+
+整份目錄在載入時一次向量化換算。只用一種單位記錄的食材維持原單位（例如 2 spoon 不會變成 30ml），
+用到多種單位的食材才換成共同的基準單位；換不過去的（缺換算欄位）仍分開列出。
+"""
+import numpy as np
+import pandas as pd
+
+# 單位 → (量綱, 換成基準單位的倍數)
+UNIT_TABLE = {
+    "g":     ("mass",   1.0),
+    "kg":    ("mass",   1000.0),
+    "mg":    ("mass",   0.001),
+    "oz":    ("mass",   28.3495),
+    "lb":    ("mass",   453.592),
+    "ml":    ("volume", 1.0),
+    "l":     ("volume", 1000.0),
+    "tsp":   ("volume", 5.0),
+    "spoon": ("volume", 15.0),   # 湯匙
+    "tbsp":  ("volume", 15.0),
+    "cup":   ("volume", 240.0),
+    "ea":    ("count",  1.0),
+}
+BASE_UNITS = {"mass": "g", "volume": "ml", "count": "ea"}
+
+
+def clean_unit(units):
+    """去掉前後空白並轉小寫（' ea' 與 'ea' 視為同一單位）。"""
+    return units.astype("string").str.strip().str.lower()
+
+
+def canonical_amounts(frame, ingredient_col="Ingredient"):
+    """回傳 frame 的副本，Amount / Unit 換成該食材的共同基準單位（原值保留在 RecipeAmount / RecipeUnit）。"""
+    unit    = clean_unit(frame["Unit"])
+    amount  = frame["Amount"].astype(float)
+    dim     = unit.map({u: d for u, (d, _) in UNIT_TABLE.items()})
+    factor  = unit.map({u: f for u, (_, f) in UNIT_TABLE.items()}).astype(float)
+    density = frame["Density"].astype(float) if "Density" in frame.columns else pd.Series(np.nan, index=frame.index)
+    each    = frame["EachWeight"].astype(float) if "EachWeight" in frame.columns else pd.Series(np.nan, index=frame.index)
+
+    # 先換成量綱的基準單位；容量 / 個數有換算欄位時再換成 g
+    base_amount = (amount * factor).where(dim.notna(), amount)
+    base_unit   = dim.map(BASE_UNITS).fillna(unit)
+    to_mass = ((dim == "volume") & density.notna()) | ((dim == "count") & each.notna())
+    to_mass = to_mass.fillna(False).astype(bool)
+    mass_factor = density.where(dim == "volume", each)
+    base_amount = base_amount.where(~to_mass, base_amount * mass_factor)
+    base_unit   = base_unit.where(~to_mass, "g")
+
+    # 只用一種單位記錄的食材維持原單位
+    key      = frame[ingredient_col].astype("string")
+    n_units  = unit.groupby(key, dropna=False).transform("nunique")
+    single   = (n_units <= 1).to_numpy()
+
+    out = frame.copy()
+    out["RecipeAmount"] = frame["Amount"]
+    out["RecipeUnit"]   = frame["Unit"]
+    out["Amount"] = np.where(single, amount, base_amount)
+    out["Unit"]   = pd.Series(np.where(single, unit, base_unit), index=frame.index).astype("string")
+    return out
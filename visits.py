@@ -0,0 +1,73 @@
+"""訪客計數：SQLite（WAL 模式）儲存，每次造訪只寫一列並更新每日 / 總計計數器。
+
+多個 session 同時寫入由 SQLite 的交易序列化，不會像重寫整個 JSON 檔那樣互相覆蓋；
+今日與總訪客數直接讀預先彙總好的計數，不必掃描全部造訪紀錄。
+"""
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_visits (
+    day   TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS total_visits (
+    id    INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO total_visits(id, count) VALUES (1, 0);
+"""
+
+
+class VisitCounter:
+    def __init__(self, db_path, legacy_json=None):
+        """legacy_json：舊版 visit_history.json，資料庫第一次建立時匯入。"""
+        self.db_path = Path(db_path)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            if legacy_json is not None and Path(legacy_json).exists():
+                # 檢查與匯入放在同一個交易，避免多個 process 重複匯入
+                conn.execute("BEGIN IMMEDIATE")
+                if conn.execute("SELECT count FROM total_visits").fetchone()[0] == 0:
+                    self._import_json(conn, legacy_json)
+                conn.execute("COMMIT")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    @staticmethod
+    def _add(conn, timestamps):
+        conn.executemany("INSERT INTO visits(timestamp) VALUES (?)", [(t,) for t in timestamps])
+        conn.executemany(
+            "INSERT INTO daily_visits(day, count) VALUES (?, 1) "
+            "ON CONFLICT(day) DO UPDATE SET count = count + 1",
+            [(t[:10],) for t in timestamps])
+        conn.execute("UPDATE total_visits SET count = count + ? WHERE id = 1", (len(timestamps),))
+
+    def _import_json(self, conn, legacy_json):
+        with open(legacy_json, "r") as f:
+            timestamps = [v["timestamp"] for v in json.load(f).get("visits", [])]
+        if timestamps:
+            self._add(conn, timestamps)
+
+    def record(self, when=None):
+        """記錄一次造訪（預設為現在時間）。"""
+        timestamp = (when or datetime.now()).strftime("%Y-%m-%dT%H:%M:%S")
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._add(conn, [timestamp])
+            conn.execute("COMMIT")
+
+    def counts(self, day):
+        """回傳 (該日造訪數, 歷史總造訪數)；day 格式為 YYYY-MM-DD。"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT count FROM daily_visits WHERE day = ?", (day,)).fetchone()
+            total = conn.execute("SELECT count FROM total_visits WHERE id = 1").fetchone()[0]
+        return (row[0] if row else 0), total